@@ -6,6 +6,11 @@ from datetime import datetime
 from dotenv import load_dotenv
 from src.main import WebSearchQASystem
 
+try:
+    import uvloop
+except ImportError:  # uvloop 미지원 환경 (Windows 등)
+    uvloop = None
+
 # .env 파일 로드
 load_dotenv()
 
@@ -35,6 +40,7 @@ async def run_e2e_test():
     # 시스템 초기화
     print("🔧 시스템 초기화 중...")
     system = WebSearchQASystem(config)
+    await system.startup()
 
     # 테스트 쿼리
     test_query = "최근 NVIDIA가 아닌 다른 AI 반도체 기업들의 산업 동향"
@@ -72,8 +78,8 @@ async def run_e2e_test():
             print("-" * 40)
             print("💾 Qdrant 저장 상태 확인...")
 
-            # 세션 데이터 저장
-            await system._save_session_data()
+            # 세션 데이터 저장 (백그라운드 저장을 마치고 조회 가능해질 때까지 대기)
+            await system.flush_session()
 
             # 저장된 데이터 로드 테스트
             try:
@@ -100,10 +106,16 @@ async def run_e2e_test():
         import traceback
 
         traceback.print_exc()
+    finally:
+        await system.shutdown()
 
     print("=" * 80)
     print("🏁 E2E 테스트 완료")
 
 
 if __name__ == "__main__":
-    asyncio.run(run_e2e_test())
+    # uvloop(libuv 기반 이벤트 루프)가 있으면 사용
+    if uvloop is not None:
+        uvloop.run(run_e2e_test())
+    else:
+        asyncio.run(run_e2e_test())
@@ -8,6 +8,11 @@ from unittest.mock import AsyncMock, patch
 from src.main import WebSearchQASystem
 from src.core.models import WebDocument, WebDocumentContent, SemanticChunk
 
+try:
+    import uvloop
+except ImportError:  # uvloop 미지원 환경 (Windows 등)
+    uvloop = None
+
 
 # Mock 데이터
 MOCK_SEARCH_RESULTS = [
@@ -124,6 +129,7 @@ async def run_e2e_test_mock():
     # 시스템 초기화
     print("🔧 시스템 초기화 중...")
     system = WebSearchQASystem(config)
+    await system.startup()
     
     # Mock 패치
     with patch.object(system.container.get_search_service(), 'search', side_effect=mock_search), \
@@ -165,8 +171,8 @@ async def run_e2e_test_mock():
                 print("-" * 40)
                 print("💾 Qdrant 저장 상태 확인...")
                 
-                # 세션 데이터 저장
-                await system._save_session_data()
+                # 세션 데이터 저장 (백그라운드 저장을 마치고 조회 가능해질 때까지 대기)
+                await system.flush_session()
                 
                 # 저장된 데이터 로드 테스트
                 try:
@@ -192,10 +198,16 @@ async def run_e2e_test_mock():
             print(f"❌ E2E 테스트 실패: {str(e)}")
             import traceback
             traceback.print_exc()
+        finally:
+            await system.shutdown()
     
     print("=" * 80)
     print("🏁 E2E 테스트 완료")
 
 
 if __name__ == "__main__":
-    asyncio.run(run_e2e_test_mock())
\ No newline at end of file
+    # uvloop(libuv 기반 이벤트 루프)가 있으면 사용
+    if uvloop is not None:
+        uvloop.run(run_e2e_test_mock())
+    else:
+        asyncio.run(run_e2e_test_mock())
\ No newline at end of file
@@ -1,11 +1,83 @@
-from typing import List
-import hashlib
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import xxhash
 from src.core.models import WebDocumentContent, SemanticChunk, IChunkingService, ILLMService
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
 
+# Contextual Retrieval 프롬프트 템플릿.
+# 문서 본문이 앞쪽 공통 접두사가 되도록 구성하여 vLLM prefix caching이 청크 간에 적중하게 한다.
+_PROMPT_HEADER = "\n<document>\n"
+_PROMPT_MID = """
+</document>
+
+Here is the chunk we want to situate within the whole document:
+<chunk>
+"""
+_PROMPT_TAIL = """
+</chunk>
+
+Please give a short succinct context to situate this chunk within the overall document for the purpose of improving search retrieval. The context should be in Korean and help identify what this chunk is about in relation to the full document.
+
+다음 사항을 고려하여 컨텍스트를 작성해주세요:
+1. 이 청크가 전체 문서에서 어떤 주제나 섹션에 속하는지
+2. 전체 문맥에서 이 정보의 역할이 무엇인지
+3. 검색 시 관련 정보를 찾는 데 도움이 되는 키워드
+
+컨텍스트는 1-2문장 내에서 간결하게 작성해주세요.
+"""
+
+
+# 컨텍스트는 1-2문장(한국어 약 40-80 토큰)이므로 생성 길이를 작게 제한하여
+# vLLM이 요청마다 예약하는 KV 캐시를 줄인다.
+_CONTEXT_MAX_TOKENS = 128
+_CONTEXT_STOP = ["</chunk>", "\n\n\n"]
+
+
+def _build_document_prefix(full_document: str) -> str:
+    """문서 단위로 한 번만 만드는 프롬프트 공통 접두사."""
+    return f"{_PROMPT_HEADER}{full_document}{_PROMPT_MID}"
+
+
+def _chunk_id(url: str, position: int, chunk_text: str) -> str:
+    """청크 식별자 생성 (비암호화 해시 - 식별 용도로만 사용).
+
+    앞부분 일부만 해싱하면 같은 문장으로 시작하는 청크끼리 충돌하여
+    저장소에서 서로 덮어쓰므로 청크 전체 내용을 해싱한다.
+    """
+    h = xxhash.xxh128(seed=0)
+    h.update(url.encode())
+    h.update(position.to_bytes(8, "little"))
+    h.update(chunk_text.encode())
+    return h.hexdigest()
+
+
+def _has_min_content(text: str, min_length: int) -> bool:
+    """공백 제거 후 길이가 min_length 이상인지 확인 (가능하면 strip 복사 생략)."""
+    if len(text) < min_length:
+        return False
+    if not text[0].isspace() and not text[-1].isspace():
+        return True
+    return len(text.strip()) >= min_length
+
+
+def _sliding_windows(
+    content: str, chunk_size: int, overlap: int, min_length: int = 50
+) -> List[Tuple[int, str]]:
+    """슬라이딩 윈도우 경계를 한 번에 계산하여 (위치, 텍스트) 목록 반환.
+
+    위치는 문자 단위 인덱스이므로 UTF-8 바이트 슬라이싱 대신 str 슬라이싱을 사용한다
+    (한글 등 멀티바이트 문자가 잘리지 않도록).
+    """
+    windows = [
+        (i, content[i : i + chunk_size])
+        for i in range(0, len(content), chunk_size - overlap)
+    ]
+    return [(i, text) for i, text in windows if _has_min_content(text, min_length)]
+
+
 class SimpleChunkingAdapter(IChunkingService):
     """간단한 청킹 어댑터 - IChunkingService 구현."""
 
@@ -16,19 +88,20 @@ class SimpleChunkingAdapter(IChunkingService):
     async def chunk_document(
         self, document: WebDocumentContent, query: str
     ) -> List[SemanticChunk]:
-        """문서를 의미적 청크로 분할."""
+        """문서를 의미적 청크로 분할 (CPU 작업은 이벤트 루프 밖 스레드에서 수행)."""
+        return await asyncio.to_thread(self._build_chunks_sync, document, query)
+
+    def _build_chunks_sync(
+        self, document: WebDocumentContent, query: str
+    ) -> List[SemanticChunk]:
+        """슬라이딩 윈도우 분할 + 청크 ID 해싱 (동기)."""
         chunks = []
-        content = document.content
 
         # 슬라이딩 윈도우 청킹
-        for i in range(0, len(content), self.chunk_size - self.overlap):
-            chunk_text = content[i : i + self.chunk_size]
-            if len(chunk_text.strip()) < 50:
-                continue
-
-            chunk_id = hashlib.md5(
-                f"{document.url}_{i}_{chunk_text[:50]}".encode()
-            ).hexdigest()
+        for i, chunk_text in _sliding_windows(
+            document.content, self.chunk_size, self.overlap
+        ):
+            chunk_id = _chunk_id(document.url, i, chunk_text)
 
             chunks.append(
                 SemanticChunk(
@@ -50,169 +123,117 @@ class SimpleChunkingAdapter(IChunkingService):
 class ContextualChunkingAdapter(IChunkingService):
     """Contextual Retrieval 기반 청킹 어댑터."""
 
-    def __init__(self, llm_service: ILLMService, chunk_size: int = 1000, overlap: int = 200):
+    def __init__(self, llm_service: ILLMService, chunk_size: int = 1000, overlap: int = 200, batch_size: int = 16):
         self.llm_service = llm_service
         self.chunk_size = chunk_size
         self.overlap = overlap
+        self.batch_size = batch_size
 
     async def chunk_document(
         self, document: WebDocumentContent, query: str
     ) -> List[SemanticChunk]:
         """LLM을 사용한 컨텍스트 추가 청킹."""
-        logger.info(f"🔍 Contextual Retrieval 청킹 시작: {document.url}")
+        logger.info("🔍 Contextual Retrieval 청킹 시작: %s", document.url)
         
         # 1단계: 기본 청킹
-        raw_chunks = self._create_raw_chunks(document.content, document.url)
-        logger.debug(f"  기본 청킹 완료: {len(raw_chunks)}개")
+        positions, texts = await asyncio.to_thread(
+            self._create_raw_chunks, document.content
+        )
+        logger.debug("  기본 청킹 완료: %d개", len(texts))
         
-        if not raw_chunks:
+        if not texts:
             return []
             
         # 2단계: 각 청크에 컨텍스트 추가 (LLM 사용)
         contextual_chunks = await self._add_context_to_chunks(
-            raw_chunks, document.content, query, document
+            positions, texts, query, document
         )
         
-        logger.info(f"✅ Contextual 청킹 완료: {len(contextual_chunks)}개")
+        logger.info("✅ Contextual 청킹 완료: %d개", len(contextual_chunks))
         return contextual_chunks
     
-    def _create_raw_chunks(self, content: str, url: str) -> List[dict]:
-        """기본 슬라이딩 윈도우 청킹."""
-        chunks = []
-        
-        for i in range(0, len(content), self.chunk_size - self.overlap):
-            chunk_text = content[i : i + self.chunk_size]
-            if len(chunk_text.strip()) < 50:
-                continue
-                
-            chunks.append({
-                'text': chunk_text,
-                'position': i,
-                'url': url
-            })
-                
-        return chunks
-    
-    async def _add_context_to_chunks(self, raw_chunks: List[dict], full_document: str, query: str, document: WebDocumentContent) -> List[SemanticChunk]:
-        """각 청크에 컨텍스트 추가 (VLLM batch inference 사용)."""
-        logger.debug(f"🤖 {len(raw_chunks)}개 청크에 VLLM 배치로 컨텍스트 추가 중...")
-        
-        # 모든 청크에 대한 프롬프트 생성
-        prompts = []
-        for i, chunk_data in enumerate(raw_chunks):
-            prompt = self._create_context_prompt(chunk_data['text'], full_document)
-            prompts.append(prompt)
-        
-        try:
-            # 개별 LLM 호출을 병렬로 처리
-            import asyncio
-            logger.info(f"📦 LLM 개별 추론 시작: {len(prompts)}개 프롬프트")
-            tasks = [self.llm_service.generate_answer("", prompt) for prompt in prompts]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            contextual_responses = []
-            for result in results:
-                if isinstance(result, Exception):
-                    logger.warning(f"개별 LLM 호출 실패: {str(result)}")
-                    contextual_responses.append("")
-                else:
-                    contextual_responses.append(result)
-                
-            logger.info(f"✅ LLM 개별 추론 완료: {len(contextual_responses)}개 응답")
-            
-        except Exception as e:
-            logger.error(f"❌ LLM 추론 실패: {str(e)}")
-            # 폴백: 원본 청크들을 그대로 사용
-            contextual_responses = [chunk['text'] for chunk in raw_chunks]
-        
-        # SemanticChunk 객체 생성
-        semantic_chunks = []
-        for i, (chunk_data, context_response) in enumerate(zip(raw_chunks, contextual_responses)):
-            # 컨텍스트 + 원본 청크 결합
-            if context_response and context_response.strip():
-                contextual_content = f"{context_response.strip()}\\n\\n{chunk_data['text']}"
-            else:
-                logger.warning(f"  청크 {i+1} 컨텍스트 생성 실패, 원본 사용")
-                contextual_content = chunk_data['text']
-            
-            chunk_id = hashlib.md5(
-                f"{chunk_data['url']}_{chunk_data['position']}_{chunk_data['text'][:50]}".encode()
-            ).hexdigest()
-            
-            semantic_chunks.append(
-                SemanticChunk(
-                    chunk_id=chunk_id,
-                    content=contextual_content,  # 컨텍스트가 추가된 컨텐츠
-                    source_url=chunk_data['url'],
-                    metadata={
-                        'position': chunk_data['position'],
-                        'query': query,
-                        'original_content': chunk_data['text'],  # 원본 컨텐츠도 저장
-                        'contextual_retrieval': True,
-                        'parent_document_id': document.document_id,  # 부모 문서 ID
-                        'updated_at': document.crawl_datetime.isoformat()  # 크롤링 시점
-                    }
-                )
-            )
-        
-        return semantic_chunks
+    def _create_raw_chunks(self, content: str) -> Tuple[List[int], List[str]]:
+        """기본 슬라이딩 윈도우 청킹 - (위치 목록, 텍스트 목록) 컬럼 형태로 반환."""
+        windows = _sliding_windows(content, self.chunk_size, self.overlap)
+        return [i for i, _ in windows], [text for _, text in windows]
     
-    def _create_context_prompt(self, chunk_text: str, full_document: str) -> str:
-        """청크에 대한 컨텍스트 생성 프롬프트 작성."""
-        return f"""
-<document>
-{full_document}
-</document>
-
-Here is the chunk we want to situate within the whole document:
-<chunk>
-{chunk_text}
-</chunk>
-
-Please give a short succinct context to situate this chunk within the overall document for the purpose of improving search retrieval. The context should be in Korean and help identify what this chunk is about in relation to the full document.
+    async def _add_context_to_chunks(self, positions: List[int], texts: List[str], query: str, document: WebDocumentContent) -> List[SemanticChunk]:
+        """각 청크에 컨텍스트 추가 (VLLM batch inference 사용).
 
-다음 사항을 고려하여 컨텍스트를 작성해주세요:
-1. 이 청크가 전체 문서에서 어떤 주제나 섹션에 속하는지
-2. 전체 문맥에서 이 정보의 역할이 무엇인지
-3. 검색 시 관련 정보를 찾는 데 도움이 되는 키워드
+        프롬프트를 batch_size 단위 배치로 나누어 동시에 요청하고,
+        응답이 도착한 배치부터 SemanticChunk를 생성한다.
+        """
+        logger.debug("🤖 %d개 청크에 VLLM 배치로 컨텍스트 추가 중...", len(texts))
+        
+        # 모든 청크에 대한 프롬프트 생성 (문서 접두사는 한 번만 생성)
+        document_prefix = _build_document_prefix(document.content)
+        prompts = [self._create_context_prompt(text, document_prefix) for text in texts]
+
+        # 동일 프롬프트는 한 번만 요청하고, 긴 프롬프트부터 제출 (prefill이 큰 요청 우선)
+        prompt_indices: Dict[str, List[int]] = {}
+        for i, prompt in enumerate(prompts):
+            prompt_indices.setdefault(prompt, []).append(i)
+        unique_prompts = sorted(prompt_indices, key=len, reverse=True)
+
+        # 배치별 요청 (공통 문서 접두사는 prefix caching으로 재사용)
+        logger.info(
+            "📦 LLM 배치 추론 시작: %d개 프롬프트 (중복 제거 전 %d개)",
+            len(unique_prompts),
+            len(prompts),
+        )
 
-컨텍스트는 1-2문장 내에서 간결하게 작성해주세요.
-"""
+        async def generate(start: int) -> Tuple[int, List[str]]:
+            try:
+                return start, await self.llm_service.generate_batch(
+                    unique_prompts[start : start + self.batch_size],
+                    max_tokens=_CONTEXT_MAX_TOKENS,
+                    stop=_CONTEXT_STOP,
+                )
+            except Exception as e:
+                logger.error("❌ LLM 추론 실패: %s", e)
+                # 폴백: 컨텍스트 없이 원본 청크 사용
+                return start, []
+
+        semantic_chunks: List[Optional[SemanticChunk]] = [None] * len(texts)
+        for next_batch in asyncio.as_completed(
+            [generate(start) for start in range(0, len(unique_prompts), self.batch_size)]
+        ):
+            start, contextual_responses = await next_batch
+            batch_prompts = unique_prompts[start : start + self.batch_size]
+            contextual_responses = contextual_responses or [""] * len(batch_prompts)
+
+            # 응답을 같은 프롬프트를 공유하는 모든 청크에 분배
+            for prompt, context_response in zip(batch_prompts, contextual_responses):
+                for i in prompt_indices[prompt]:
+                    semantic_chunks[i] = self._build_semantic_chunk(
+                        positions[i], texts[i], context_response, query, document
+                    )
+
+        logger.info("✅ LLM 배치 추론 완료: %d개 응답", len(semantic_chunks))
+        return [chunk for chunk in semantic_chunks if chunk is not None]
+
+    def _build_semantic_chunk(self, position: int, text: str, context_response: str, query: str, document: WebDocumentContent) -> SemanticChunk:
+        """컨텍스트 + 원본 청크를 결합한 SemanticChunk 생성."""
+        if context_response and context_response.strip():
+            contextual_content = f"{context_response.strip()}\n\n{text}"
+        else:
+            logger.warning("  청크 (위치 %d) 컨텍스트 생성 실패, 원본 사용", position)
+            contextual_content = text
+
+        return SemanticChunk(
+            chunk_id=_chunk_id(document.url, position, text),
+            content=contextual_content,  # 컨텍스트가 추가된 컨텐츠
+            source_url=document.url,
+            metadata={
+                'position': position,
+                'query': query,
+                'original_content': text,  # 원본 컨텐츠도 저장
+                'contextual_retrieval': True,
+                'parent_document_id': document.document_id,  # 부모 문서 ID
+                'updated_at': document.crawl_datetime.isoformat()  # 크롤링 시점
+            }
+        )
     
-    async def _generate_context_for_chunk(self, chunk_text: str, full_document: str, query: str, chunk_num: int, total_chunks: int) -> str:
-        """단일 청크에 대한 컨텍스트 생성."""
-        # Anthropic Contextual Retrieval 프롬프트 기반
-        prompt = f"""
-<document>
-{full_document}
-</document>
-
-Here is the chunk we want to situate within the whole document:
-<chunk>
-{chunk_text}
-</chunk>
-
-Please give a short succinct context to situate this chunk within the overall document for the purpose of improving search retrieval. The context should be in Korean and help identify what this chunk is about in relation to the full document.
-
-다음 사항을 고려하여 컨텍스트를 작성해주세요:
-1. 이 청크가 전체 문서에서 어떤 주제나 섹션에 속하는지
-2. 전체 문맥에서 이 정보의 역할이 무엇인지
-3. 검색 시 관련 정보를 찾는 데 도움이 되는 키워드
-
-컨텍스트는 1-2문장 내에서 간결하게 작성해주세요.
-"""
-        
-        try:
-            # LLM을 사용하여 컨텍스트 생성
-            context = await self.llm_service.generate_answer(query="", context=prompt)
-            
-            # 컨텍스트 + 원본 청크 결합
-            contextual_chunk = f"{context.strip()}\n\n{chunk_text}"
-            
-            logger.debug(f"    청크 {chunk_num}/{total_chunks} 컨텍스트 생성 완료")
-            return contextual_chunk
-            
-        except Exception as e:
-            logger.error(f"    청크 {chunk_num}/{total_chunks} 컨텍스트 생성 실패: {str(e)}")
-            # 실패 시 원본 청크 반환
-            return chunk_text
+    def _create_context_prompt(self, chunk_text: str, document_prefix: str) -> str:
+        """청크에 대한 컨텍스트 생성 프롬프트 작성 (문서 접두사는 청크 간 공유)."""
+        return f"{document_prefix}{chunk_text}{_PROMPT_TAIL}"
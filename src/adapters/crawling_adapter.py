@@ -1,16 +1,67 @@
-from typing import Optional
-from playwright.async_api import async_playwright
-from bs4 import BeautifulSoup
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from playwright.async_api import async_playwright, Browser, Playwright, Route
+from selectolax.lexbor import LexborHTMLParser
 import html2text
 import asyncio
 import random
+import time
 from src.core.models import WebDocumentContent, ICrawlingService
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# 최종 마크다운 길이 제한
+MAX_CONTENT_CHARS = 50_000
+# HTML → 마크다운 변환 시 약 4배 압축되므로 정제한 HTML을 변환 전에 미리 잘라냄
+MAX_HTML_CHARS = 200_000
+# 텍스트 추출에 필요 없는 리소스 타입 (네트워크 전송량 절감)
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "stylesheet"})
+
+
+# 프로세스 내 공유 크롤러 (시스템 인스턴스 간 Chromium 브라우저와 크롤링 캐시 공유)
+_SHARED_CRAWLER: Optional["PlaywrightCrawler"] = None
+# 공유 크롤러를 사용 중인 소유자(컨테이너) 수 (마지막 소유자가 반환할 때 브라우저 종료)
+_SHARED_CRAWLER_REFS = 0
+
+
+def get_shared_crawler() -> "PlaywrightCrawler":
+    """공유 PlaywrightCrawler 반환 (최초 호출 시 생성).
+
+    브라우저는 하나만 실행되고 동시 페이지 수는 크롤러의 Semaphore로 제한되므로,
+    시스템을 여러 개 만들어도 무거운 브라우저 프로세스가 늘어나지 않는다.
+    """
+    global _SHARED_CRAWLER
+    if _SHARED_CRAWLER is None:
+        _SHARED_CRAWLER = PlaywrightCrawler()
+    return _SHARED_CRAWLER
+
+
+def acquire_shared_crawler() -> "PlaywrightCrawler":
+    """공유 크롤러 사용 등록 후 반환 (release_shared_crawler와 짝으로 호출)."""
+    global _SHARED_CRAWLER_REFS
+    _SHARED_CRAWLER_REFS += 1
+    return get_shared_crawler()
+
+
+async def release_shared_crawler() -> None:
+    """공유 크롤러 사용 해제 (다른 소유자가 남아 있으면 브라우저를 닫지 않음)."""
+    global _SHARED_CRAWLER_REFS
+    _SHARED_CRAWLER_REFS = max(_SHARED_CRAWLER_REFS - 1, 0)
+    if _SHARED_CRAWLER_REFS == 0 and _SHARED_CRAWLER is not None:
+        await _SHARED_CRAWLER.shutdown()
 
 
 class PlaywrightCrawler(ICrawlingService):
-    """Playwright 기반 크롤러 - ICrawlingService 구현."""
+    """Playwright 기반 크롤러 - ICrawlingService 구현.
+
+    Chromium 브라우저는 한 번만 실행하여 재사용하고, URL마다 가벼운
+    BrowserContext만 새로 생성한다. 동시 크롤링 수는 Semaphore로 제한하며,
+    봇 방지 지연은 같은 호스트에 대한 요청 사이에만 적용한다.
+    크롤링 결과는 URL 단위로 TTL 동안 캐시하며, 진행 중인 동일 URL 요청도 하나로 합친다.
+    """
 
-    def __init__(self):
+    def __init__(self, concurrency: int = 8, cache_ttl: float = 600.0):
         self.h2t = html2text.HTML2Text()
         self.h2t.ignore_links = True
         self.h2t.ignore_images = True
@@ -18,36 +69,153 @@ class PlaywrightCrawler(ICrawlingService):
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
             "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
         ]
+        self._pw: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self.concurrency = concurrency
+        self.cache_ttl = cache_ttl
+        self._reset_loop_state()
+
+    def _reset_loop_state(self) -> None:
+        """이벤트 루프에 묶이는 동기화 객체와 크롤링 캐시 초기화."""
+        self._browser_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._host_locks: Dict[str, asyncio.Lock] = {}
+        # url -> (생성 시각, 크롤링 Task) - 삽입 순서가 곧 생성 시각 순서
+        self._cache: Dict[str, Tuple[float, "asyncio.Task[Optional[WebDocumentContent]]"]] = {}
+
+    async def startup(self) -> None:
+        """Playwright 드라이버와 Chromium 브라우저를 미리 실행 (앱 초기화 시 호출)."""
+        await self._get_browser()
+
+    async def _get_browser(self) -> Browser:
+        """공유 브라우저 반환 (startup 전이면 최초 호출 시 실행)."""
+        async with self._browser_lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._pw is None:
+                    self._pw = await async_playwright().start()
+                self._browser = await self._pw.chromium.launch(
+                    headless=True,
+                    args=["--disable-dev-shm-usage", "--no-sandbox"],
+                )
+            return self._browser
+
+    async def _block_heavy_resources(self, route: Route) -> None:
+        """이미지/폰트/미디어/스타일시트 요청 차단."""
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _host_delay(self, url: str) -> None:
+        """같은 호스트 요청 간 랜덤 지연 (봇 방지)."""
+        host = urlparse(url).netloc
+        lock = self._host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            await asyncio.sleep(random.uniform(0.1, 0.5))
+
+    async def crawl_many(self, urls: List[str]) -> List[Optional[WebDocumentContent]]:
+        """여러 URL 동시 크롤링 (입력 순서 유지)."""
+        return await asyncio.gather(*[self.crawl(url) for url in urls])
 
     async def crawl(self, url: str) -> Optional[WebDocumentContent]:
-        """웹 페이지 크롤링 및 마크다운 변환."""
+        """웹 페이지 크롤링 및 마크다운 변환 (URL 단위 캐시).
+
+        크롤링은 호출자와 분리된 Task에서 실행하고 호출자는 shield로 기다리므로,
+        한 호출자가 취소되어도 같은 URL을 기다리는 다른 호출자에게 전파되지 않는다.
+        """
+        now = time.monotonic()
+        self._evict_expired(now)
+        cached = self._cache.get(url)
+        if cached is None:
+            task = asyncio.create_task(self._crawl_limited(url))
+            self._cache[url] = (now, task)
+            task.add_done_callback(lambda t: self._discard_failed(url, t))
+        else:
+            task = cached[1]
+        return await asyncio.shield(task)
+
+    async def _crawl_limited(self, url: str) -> Optional[WebDocumentContent]:
+        """동시 크롤링 수 제한 하에 단일 URL 크롤링."""
+        async with self._semaphore:
+            return await self._crawl_one(url)
+
+    def _discard_failed(self, url: str, task: "asyncio.Task[Optional[WebDocumentContent]]") -> None:
+        """실패/취소된 크롤링은 캐시에서 제거하여 이후 재시도 가능하게 함."""
+        if task.cancelled() or task.exception() is not None or task.result() is None:
+            cached = self._cache.get(url)
+            if cached is not None and cached[1] is task:
+                del self._cache[url]
+
+    def _evict_expired(self, now: float) -> None:
+        """TTL이 지난 캐시 항목 제거 (오래된 항목부터 확인하고 만료되지 않은 항목에서 중단)."""
+        while self._cache:
+            url, (created, _) = next(iter(self._cache.items()))
+            if now - created < self.cache_ttl:
+                break
+            del self._cache[url]
+
+    async def _crawl_one(self, url: str) -> Optional[WebDocumentContent]:
+        """단일 URL 크롤링."""
         try:
-            # 랜덤 지연 (봇 방지)
-            await asyncio.sleep(random.uniform(0.5, 2.0))
+            await self._host_delay(url)
 
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                context = await browser.new_context(
-                    user_agent=random.choice(self.user_agents)
-                )
+            browser = await self._get_browser()
+            context = await browser.new_context(
+                user_agent=random.choice(self.user_agents)
+            )
+            try:
+                await context.route("**/*", self._block_heavy_resources)
                 page = await context.new_page()
 
-                await page.goto(url, wait_until="networkidle", timeout=10000)
+                # DOM만 읽으므로 networkidle까지 기다리지 않음
+                await page.goto(url, wait_until="domcontentloaded", timeout=10000)
                 html_content = await page.content()
-                await browser.close()
-
-            # HTML 정제
-            soup = BeautifulSoup(html_content, "html.parser")
-            for tag in soup(["script", "style", "nav", "footer"]):
-                tag.decompose()
-
-            # 마크다운 변환
-            markdown = self.h2t.handle(str(soup))
+            finally:
+                await context.close()
 
             return WebDocumentContent(
                 url=url,
-                content=markdown[:50000],  # 길이 제한
+                content=self._to_markdown(html_content),
             )
         except Exception as e:
-            print(f"Crawling error for {url}: {e}")
+            logger.warning("⚠️ 크롤링 실패 %s: %s", url, e)
             return None
+
+    def _to_markdown(self, html_content: str) -> str:
+        """HTML 정제 후 마크다운 변환.
+
+        <head>의 큰 인라인 스크립트/JSON(__NEXT_DATA__ 등) 때문에 본문이 잘려 나가지 않도록
+        C 기반 lexbor 파서로 불필요한 태그를 먼저 제거하고, 비싼 html2text 변환 전에만 자른다.
+        """
+        tree = LexborHTMLParser(html_content)
+        for node in tree.css("script, style, nav, footer"):
+            node.decompose()
+
+        # 버려질 꼬리 부분은 변환하지 않도록 정제된 HTML을 잘라냄
+        pruned = (tree.html or "")[:MAX_HTML_CHARS]
+        markdown = self.h2t.handle(pruned)
+        return markdown[:MAX_CONTENT_CHARS]  # 길이 제한
+
+    async def shutdown(self) -> None:
+        """브라우저 및 Playwright 드라이버 종료.
+
+        종료 후 다시 사용하면 (다른 이벤트 루프에서도) 브라우저를 새로 실행한다.
+        """
+        # 진행 중인 크롤링은 브라우저를 닫기 전에 취소
+        for _, task in list(self._cache.values()):
+            task.cancel()
+        async with self._browser_lock:
+            if self._browser is not None:
+                await self._browser.close()
+                self._browser = None
+            if self._pw is not None:
+                await self._pw.stop()
+                self._pw = None
+        self._reset_loop_state()
+
+    async def __aenter__(self):
+        await self.startup()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.shutdown()
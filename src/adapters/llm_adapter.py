@@ -1,14 +1,44 @@
 """Adapter implementations for external services - implements core interfaces."""
 
 # src/adapters/llm_adapter.py
-from typing import List
+from typing import AsyncIterator, List, Optional
+import asyncio
+import re
 import httpx
-import json
+import orjson
 from src.core.models import SearchQuery, ILLMService
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# "1. 쿼리" 형식의 번호 매김 라인
+_NUMBERED_LINE_RE = re.compile(r"^\s*\d+\.\s*(.+)$")
+
+_QUERY_PROMPT_TEMPLATE = """다음 사용자 질문을 분석하여 웹 검색에 적합한 3개의 다양한 검색 쿼리를 생성해주세요.
+원본 질문: {user_query}
+
+각 쿼리는 서로 다른 관점이나 키워드를 사용해야 합니다.
+
+응답 형식:
+1. [첫 번째 검색 쿼리]
+2. [두 번째 검색 쿼리]  
+3. [세 번째 검색 쿼리]"""
+
+_ANSWER_PROMPT_TEMPLATE = """다음 컨텍스트를 바탕으로 사용자 질문에 대해 정확하고 유용한 답변을 제공해주세요.
+
+컨텍스트:
+{context}
+
+질문: {query}
+
+답변은 다음 조건을 만족해야 합니다:
+1. 컨텍스트에 기반한 정확한 정보 제공
+2. 명확하고 이해하기 쉬운 한국어
+3. 가능한 한 구체적인 정보 포함
+4. 출처가 불분명한 정보는 포함하지 않음
+
+답변:"""
+
 
 class VLLMAdapter(ILLMService):
     """VLLM 서빙 LLM 어댑터 - ILLMService 구현."""
@@ -19,42 +49,39 @@ class VLLMAdapter(ILLMService):
         embedding_model: str = "bge-large:335m",
         base_url: str = "http://localhost:8000/v1",
         embedding_base_url: str = "http://localhost:11434/v1",
+        embedding_batch_size: int = 64,
     ):
         self.model_name = model_name
         self.embedding_model = embedding_model
         self.base_url = base_url
         self.embedding_base_url = embedding_base_url
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self.embedding_batch_size = embedding_batch_size
+        # HTTP/2 멀티플렉싱 + keep-alive 연결 재사용
+        self.client = httpx.AsyncClient(
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+        )
 
     async def generate_queries(self, user_query: str) -> List[SearchQuery]:
         """멀티 쿼리 생성 구현."""
-        logger.debug(f"🤖 LLM 쿼리 생성 시작: {user_query}")
-        prompt = f"""다음 사용자 질문을 분석하여 웹 검색에 적합한 3개의 다양한 검색 쿼리를 생성해주세요.
-원본 질문: {user_query}
-
-각 쿼리는 서로 다른 관점이나 키워드를 사용해야 합니다.
-
-응답 형식:
-1. [첫 번째 검색 쿼리]
-2. [두 번째 검색 쿼리]  
-3. [세 번째 검색 쿼리]"""
+        logger.debug("🤖 LLM 쿼리 생성 시작: %s", user_query)
+        prompt = _QUERY_PROMPT_TEMPLATE.format(user_query=user_query)
 
         try:
             response = await self._call_vllm(prompt)
             # 응답에서 쿼리 추출
-            lines = response.strip().split("\n")
             processed_queries = []
-            for line in lines:
-                if line.strip() and any(line.startswith(f"{i}.") for i in range(1, 10)):
-                    query = line.split(".", 1)[1].strip()
-                    if query:
-                        processed_queries.append(query)
+            for line in response.splitlines():
+                match = _NUMBERED_LINE_RE.match(line)
+                if match:
+                    processed_queries.append(match.group(1).strip())
 
             # 최소 1개 쿼리는 보장
             if not processed_queries:
                 processed_queries = [user_query]
 
-            logger.info(f"✅ {len(processed_queries)}개 검색 쿼리 생성 완료")
+            logger.info("✅ %d개 검색 쿼리 생성 완료", len(processed_queries))
             return [
                 SearchQuery(
                     original_query=user_query,
@@ -63,40 +90,68 @@ class VLLMAdapter(ILLMService):
             ]
 
         except Exception as e:
-            logger.error(f"❌ 쿼리 생성 실패: {str(e)}")
+            logger.error("❌ 쿼리 생성 실패: %s", e)
             # 에러 시 기본 쿼리 반환
             return [
                 SearchQuery(original_query=user_query, processed_queries=[user_query])
             ]
 
-    async def generate_answer(self, query: str, context: str) -> str:
+    async def generate_answer(
+        self, query: str, context: str, max_tokens: int = 1024
+    ) -> str:
         """답변 생성 구현."""
 
-        prompt = f"""다음 컨텍스트를 바탕으로 사용자 질문에 대해 정확하고 유용한 답변을 제공해주세요.
-
-컨텍스트:
-{context}
-
-질문: {query}
-
-답변은 다음 조건을 만족해야 합니다:
-1. 컨텍스트에 기반한 정확한 정보 제공
-2. 명확하고 이해하기 쉬운 한국어
-3. 가능한 한 구체적인 정보 포함
-4. 출처가 불분명한 정보는 포함하지 않음
-
-답변:"""
+        prompt = _ANSWER_PROMPT_TEMPLATE.format(context=context, query=query)
 
         try:
-            logger.debug(f"💭 답변 생성 시작: {prompt}")
-            answer = await self._call_vllm(prompt)
-            logger.info(f"✅ 답변 생성 완료: {len(answer)}자")
+            logger.debug("💭 답변 생성 시작: %s", prompt)
+            answer = await self._call_vllm(prompt, max_tokens=max_tokens)
+            logger.info("✅ 답변 생성 완료: %d자", len(answer))
             return answer
         except Exception as e:
-            logger.error(f"❌ 답변 생성 실패: {str(e)}")
+            logger.error("❌ 답변 생성 실패: %s", e)
             return f"죄송합니다. 답변 생성 중 오류가 발생했습니다: {str(e)}"
 
-    async def _call_vllm(self, prompt: str) -> str:
+    async def stream_answer(
+        self, query: str, context: str, max_tokens: int = 1024
+    ) -> AsyncIterator[str]:
+        """답변 스트리밍 생성 (SSE로 도착하는 토큰을 바로 전달)."""
+        prompt = _ANSWER_PROMPT_TEMPLATE.format(context=context, query=query)
+        payload = {
+            "model": self.model_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": True,
+            "temperature": 0.1,
+            "max_tokens": max_tokens,
+        }
+
+        received = 0
+        try:
+            logger.debug("📡 LLM 스트리밍 API 호출: %s", self.base_url)
+            async with self.client.stream(
+                "POST",
+                f"{self.base_url}/chat/completions",
+                content=orjson.dumps(payload),
+                headers={"Content-Type": "application/json"},
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    delta = orjson.loads(data)["choices"][0].get("delta", {}).get("content")
+                    if delta:
+                        received += len(delta)
+                        yield delta
+            logger.info("✅ 답변 스트리밍 완료: %d자", received)
+        except Exception as e:
+            logger.error("❌ 답변 스트리밍 실패: %s", e)
+            if not received:
+                yield f"죄송합니다. 답변 생성 중 오류가 발생했습니다: {str(e)}"
+
+    async def _call_vllm(self, prompt: str, max_tokens: int = 1024) -> str:
         """VLLM 서빙 API 호출."""
         try:
             payload = {
@@ -104,53 +159,94 @@ class VLLMAdapter(ILLMService):
                 "messages": [{"role": "user", "content": prompt}],
                 "stream": False,
                 "temperature": 0.1,
-                "max_tokens": 1024,
+                "max_tokens": max_tokens,
             }
 
-            logger.debug(f"📡 LLM API 호출: {self.base_url}")
-            response = await self.client.post(
-                f"{self.base_url}/chat/completions",
-                json=payload,
-                headers={"Content-Type": "application/json"},
-            )
-            response.raise_for_status()
-
-            result = response.json()
-            logger.debug(
-                f"📥 LLM 응답 수신: {len(result['choices'][0]['message']['content'])}자"
-            )
-            return result["choices"][0]["message"]["content"]
+            logger.debug("📡 LLM API 호출: %s", self.base_url)
+            result = await self._post_json(f"{self.base_url}/chat/completions", payload)
+            content = result["choices"][0]["message"]["content"]
+            logger.debug("📥 LLM 응답 수신: %d자", len(content))
+            return content
 
         except Exception as e:
-            logger.error(f"❌ VLLM API 호출 실패: {str(e)}")
+            logger.error("❌ VLLM API 호출 실패: %s", e)
             raise Exception(f"VLLM API 호출 실패: {str(e)}")
 
-    async def get_embeddings(self, texts: List[str]) -> List[List[float]]:
-        """텍스트 임베딩 생성 (VLLM 임베딩 서빙)."""
-        logger.debug(f"🔮 임베딩 생성 시작: {len(texts)}개 텍스트")
+    async def generate_batch(
+        self,
+        prompts: List[str],
+        max_tokens: int = 128,
+        stop: Optional[List[str]] = None,
+    ) -> List[str]:
+        """배치 텍스트 생성 (/completions 엔드포인트에 프롬프트 리스트 전달).
+
+        공통 접두사(문서 본문)를 공유하는 프롬프트들은 vLLM의
+        --enable-prefix-caching 옵션으로 prefill 결과를 재사용한다.
+        """
+        if not prompts:
+            return []
+
         try:
-            embeddings = []
-            for i, text in enumerate(texts):
-                payload = {"model": self.embedding_model, "input": text}
-
-                response = await self.client.post(
-                    f"{self.embedding_base_url}/embeddings",
-                    json=payload,
-                    headers={"Content-Type": "application/json"},
-                )
-                response.raise_for_status()
+            payload = {
+                "model": self.model_name,
+                "prompt": prompts,
+                "stream": False,
+                "temperature": 0.1,
+                "max_tokens": max_tokens,
+            }
+            if stop:
+                payload["stop"] = stop
+
+            logger.debug("📡 LLM 배치 API 호출: %d개 프롬프트", len(prompts))
+            result = await self._post_json(f"{self.base_url}/completions", payload)
+            # choices는 index 기준으로 프롬프트 순서와 매칭
+            texts = [""] * len(prompts)
+            for choice in result["choices"]:
+                texts[choice["index"]] = choice["text"]
+            return texts
 
-                result = response.json()
-                embeddings.append(result["data"][0]["embedding"])
-                logger.debug(f"  텍스트 {i + 1}/{len(texts)} 임베딩 완료")
+        except Exception as e:
+            logger.error("❌ VLLM 배치 API 호출 실패: %s", e)
+            raise Exception(f"VLLM 배치 API 호출 실패: {str(e)}")
 
-            logger.info(f"✅ 총 {len(embeddings)}개 임베딩 생성 완료")
+    async def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """텍스트 임베딩 생성 (배치 단위 요청을 동시에 전송)."""
+        logger.debug("🔮 임베딩 생성 시작: %d개 텍스트", len(texts))
+        try:
+            batches = [
+                texts[i : i + self.embedding_batch_size]
+                for i in range(0, len(texts), self.embedding_batch_size)
+            ]
+            results = await asyncio.gather(
+                *[self._embed_batch(batch) for batch in batches]
+            )
+            embeddings = [embedding for batch in results for embedding in batch]
+
+            logger.info("✅ 총 %d개 임베딩 생성 완료", len(embeddings))
             return embeddings
 
         except Exception as e:
-            logger.error(f"❌ 임베딩 생성 실패: {str(e)}")
+            logger.error("❌ 임베딩 생성 실패: %s", e)
             raise Exception(f"임베딩 생성 실패: {str(e)}")
 
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """단일 임베딩 API 호출로 여러 텍스트 임베딩."""
+        payload = {"model": self.embedding_model, "input": texts}
+        result = await self._post_json(f"{self.embedding_base_url}/embeddings", payload)
+        data = sorted(result["data"], key=lambda d: d["index"])
+        logger.debug("  %d개 텍스트 배치 임베딩 완료", len(texts))
+        return [d["embedding"] for d in data]
+
+    async def _post_json(self, url: str, payload: dict) -> dict:
+        """orjson으로 직렬화/역직렬화하는 JSON POST 요청."""
+        response = await self.client.post(
+            url,
+            content=orjson.dumps(payload),
+            headers={"Content-Type": "application/json"},
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
     async def __aenter__(self):
         return self
 
@@ -1,75 +1,247 @@
-from typing import List
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from datetime import datetime
+import asyncio
+import uuid
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Batch, Distance, VectorParams
 from src.core.models import SemanticChunk, IPersistentStore
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# 임베딩 모델(bge-large) 벡터 차원
+VECTOR_SIZE = 1024
+# 한 번의 upsert 요청에 담는 포인트 수
+UPSERT_BATCH_SIZE = 256
+# 클라이언트 커넥션 풀 크기 (동시 upsert 요청 수 상한)
+POOL_SIZE = 100
+
+# (host, port) 별로 공유하는 비동기 클라이언트 (커넥션 풀 재사용)
+_CLIENTS: Dict[Tuple[str, int], AsyncQdrantClient] = {}
+# 클라이언트별 사용 중인 저장소 수 (마지막 저장소가 반환할 때 종료)
+_CLIENT_REFS: Dict[Tuple[str, int], int] = {}
+
+
+def _acquire_client(host: str, port: int) -> AsyncQdrantClient:
+    """(host, port)에 대한 공유 AsyncQdrantClient 반환 (참조 수 증가)."""
+    key = (host, port)
+    if key not in _CLIENTS:
+        _CLIENTS[key] = AsyncQdrantClient(
+            host=host,
+            port=port,
+            prefer_grpc=True,
+            grpc_port=6334,
+            pool_size=POOL_SIZE,
+            timeout=60,
+        )
+    _CLIENT_REFS[key] = _CLIENT_REFS.get(key, 0) + 1
+    return _CLIENTS[key]
+
+
+async def _release_client(host: str, port: int) -> None:
+    """공유 클라이언트 반환 (다른 저장소가 아직 사용 중이면 닫지 않음)."""
+    key = (host, port)
+    refs = _CLIENT_REFS.get(key, 0) - 1
+    if refs > 0:
+        _CLIENT_REFS[key] = refs
+        return
+    _CLIENT_REFS.pop(key, None)
+    client = _CLIENTS.pop(key, None)
+    if client is not None:
+        await client.close()
+
+
+def _chunked(chunks: List[SemanticChunk], n: int = UPSERT_BATCH_SIZE) -> Iterator[List[SemanticChunk]]:
+    """청크 목록을 n개 단위 배치로 분할."""
+    for i in range(0, len(chunks), n):
+        yield chunks[i : i + n]
+
+
+def _to_batch(chunks: List[SemanticChunk]) -> Batch:
+    """청크 목록을 컬럼 형태의 Qdrant Batch로 변환 (포인트별 PointStruct 생성 생략)."""
+    return Batch(
+        ids=[_point_id(chunk.chunk_id) for chunk in chunks],
+        vectors=[chunk.embedding for chunk in chunks],
+        payloads=[_payload(chunk) for chunk in chunks],
+    )
+
+
+def _point_id(chunk_id: str) -> str:
+    """청크 ID로부터 결정적인 UUID 포인트 ID 생성 (재저장 시 같은 포인트를 덮어씀)."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, chunk_id))
+
+
+def _payload(chunk: SemanticChunk) -> Dict[str, Any]:
+    """포인트 payload 생성 (embedding은 vector로 따로 저장하므로 제외)."""
+    payload = chunk.__dict__.copy()
+    payload.pop("embedding", None)
+    payload["created_at"] = payload["created_at"].isoformat()
+    return payload
+
+
+def _chunk_from_point(payload: Dict[str, Any], vector: Any) -> SemanticChunk:
+    """저장된 payload로부터 검증 없이 SemanticChunk 복원 (신뢰할 수 있는 DB 데이터)."""
+    data = dict(payload)
+    # 이전 버전에서 payload에 함께 저장한 embedding은 무시하고 vector를 사용
+    data.pop("embedding", None)
+    if "created_at" in data:
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+    return SemanticChunk.model_construct(**data, embedding=vector)
+
+
+async def close_clients() -> None:
+    """공유 클라이언트 전체 종료 (프로세스 종료 시 호출, 사용 중인 저장소와 무관하게 닫음)."""
+    _CLIENT_REFS.clear()
+    while _CLIENTS:
+        _, client = _CLIENTS.popitem()
+        await client.close()
 
 
 class QdrantPersistentStore(IPersistentStore):
     """Qdrant 영구 저장소 어댑터 - IPersistentStore 구현."""
 
     def __init__(self, session_id: str = "default", host: str = "localhost", port: int = 6333):
-        # Docker 또는 외부 Qdrant 서버에 연결
-        try:
-            self.client = QdrantClient(host=host, port=port)
-            print(f"✅ Qdrant 서버 연결 성공: {host}:{port}")
-        except Exception as e:
-            print(f"❌ Qdrant 서버 연결 실패: {str(e)}")
-            raise Exception(f"Qdrant 서버에 연결할 수 없습니다: {host}:{port}")
+        # Docker 또는 외부 Qdrant 서버에 연결 (프로세스 내 공유 클라이언트, 처음 사용할 때 생성)
+        self._host = host
+        self._port = port
+        self._client: Optional[AsyncQdrantClient] = None
+        # 공유 클라이언트 참조를 이 저장소가 잡고 있는지 (close 시 반환)
+        self._owns_client = False
         self.collection_name = f"session_{session_id}"
-        self._init_collection()
+        self._collection_ready = False
+        # 백그라운드 세션 로드와 startup이 동시에 컬렉션을 만들지 않도록 초기화를 직렬화
+        self._init_lock = asyncio.Lock()
+        self._upsert_semaphore = asyncio.Semaphore(POOL_SIZE)
+
+    @property
+    def client(self) -> AsyncQdrantClient:
+        """Qdrant 클라이언트 (세션 로드/저장 전까지 gRPC 채널을 만들지 않음)."""
+        if self._client is None:
+            self._client = _acquire_client(self._host, self._port)
+            self._owns_client = True
+        return self._client
+
+    @client.setter
+    def client(self, client: AsyncQdrantClient) -> None:
+        self._client = client
+        self._owns_client = False
+
+    async def close(self) -> None:
+        """공유 클라이언트 반환 (앱 종료 시 호출, 마지막 사용자일 때만 실제로 닫힘)."""
+        if self._owns_client:
+            self._owns_client = False
+            self._client = None
+            self._collection_ready = False
+            await _release_client(self._host, self._port)
+
+    async def startup(self) -> None:
+        """Qdrant 연결 및 컬렉션 준비 (앱 초기화 시 호출, 서버에 연결할 수 없으면 RuntimeError)."""
+        await self._init_collection()
 
-    def _init_collection(self):
-        """컬렉션 초기화 - 기존 컬렉션이 있으면 재사용, 없으면 생성."""
+    async def _init_collection(self):
+        """컬렉션 초기화 - 기존 컬렉션이 있으면 재사용, 없으면 생성 (동시 호출은 한 번만 실행)."""
+        if self._collection_ready:
+            return
+        async with self._init_lock:
+            if not self._collection_ready:
+                await self._create_collection_if_missing()
+
+    async def _create_collection_if_missing(self):
+        """컬렉션 존재/차원 확인 후 필요하면 생성 (_init_lock 보유 중 호출)."""
         try:
-            # 기존 컬렉션 존재 여부 확인
-            collections = self.client.get_collections()
-            collection_exists = any(
-                collection.name == self.collection_name 
-                for collection in collections.collections
+            if await self.client.collection_exists(self.collection_name):
+                info = await self.client.get_collection(self.collection_name)
+                if info.config.params.vectors.size == VECTOR_SIZE:
+                    logger.debug("🔄 기존 컬렉션 '%s' 재사용", self.collection_name)
+                    self._collection_ready = True
+                    return
+                # 벡터 차원이 다른 경우에만 재생성
+                logger.warning("⚠️ 컬렉션 '%s' 벡터 차원 불일치, 재생성합니다.", self.collection_name)
+                await self.client.delete_collection(self.collection_name)
+
+            # 새 컬렉션 생성 (1024차원)
+            await self.client.create_collection(
+                collection_name=self.collection_name,
+                vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE),
             )
-            
-            if collection_exists:
-                print(f"🔄 기존 컬렉션 '{self.collection_name}' 재사용")
-            else:
-                # 새 컬렉션 생성 (1024차원)
-                self.client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=VectorParams(size=1024, distance=Distance.COSINE),
-                )
-                print(f"✅ 새 컬렉션 '{self.collection_name}' 생성 완료 (1024차원)")
-                
+            logger.info("✅ 새 컬렉션 '%s' 생성 완료 (%d차원)", self.collection_name, VECTOR_SIZE)
+            self._collection_ready = True
+
         except Exception as e:
-            print(f"❌ 컬렉션 초기화 실패: {str(e)}")
-            pass
+            # 임베디드(path) 모드로 대체하지 않고 즉시 실패 (프로세스별 DB 분기 방지)
+            raise RuntimeError(
+                "Qdrant 서버에 연결할 수 없습니다. `docker compose up -d qdrant`로 서버를 실행하세요."
+            ) from e
+
+    async def save_session(self, chunks: List[SemanticChunk], wait: bool = False) -> None:
+        """세션 데이터 영구 저장 (기본은 WAL 반영을 기다리지 않고, wait=True면 반영 완료까지 대기).
 
-    async def save_session(self, chunks: List[SemanticChunk]) -> None:
-        """세션 데이터 영구 저장."""
+        저장에 실패하면 예외를 그대로 전달하여 호출자가 저장되지 않은 청크를 다시 시도할 수 있게 한다.
+        """
         try:
-            points = []
-            for i, chunk in enumerate(chunks):
-                if chunk.embedding:
-                    points.append(
-                        PointStruct(
-                            id=i, vector=chunk.embedding, payload=chunk.model_dump()
-                        )
-                    )
-
-            if points:
-                self.client.upsert(collection_name=self.collection_name, points=points)
-                print(f"💾 {len(points)}개 청크를 '{self.collection_name}' 컬렉션에 저장했습니다.")
+            await self._init_collection()
+
+            valid = [chunk for chunk in chunks if chunk.embedding]
+
+            if valid:
+                # 배치 단위로 나누어 동시에 저장
+                await asyncio.gather(
+                    *(self._upsert_batch(_to_batch(batch), wait) for batch in _chunked(valid))
+                )
+                logger.info("💾 %d개 청크를 '%s' 컬렉션에 저장했습니다.", len(valid), self.collection_name)
         except Exception as e:
-            print(f"❌ 세션 데이터 저장 실패: {str(e)}")
+            logger.error("❌ 세션 데이터 저장 실패: %s", e)
+            raise
 
-    async def load_session(self, limit: int = 1000) -> List[SemanticChunk]:
-        """세션 데이터 로드."""
-        try:
-            results = self.client.scroll(collection_name=self.collection_name, limit=limit)
+    async def _upsert_batch(self, points: Batch, wait: bool = False) -> None:
+        """단일 배치 upsert (동시 요청 수는 커넥션 풀 크기로 제한)."""
+        async with self._upsert_semaphore:
+            await self.client.upsert(
+                collection_name=self.collection_name, points=points, wait=wait
+            )
 
-            chunks = []
-            for point in results[0]:
-                chunk_data = point.payload
-                chunks.append(SemanticChunk(**chunk_data))
+    async def iter_session(
+        self,
+        page_size: int = 256,
+        fields: Optional[List[str]] = None,
+        with_vectors: bool = True,
+    ) -> AsyncIterator[SemanticChunk]:
+        """세션 데이터를 scroll 커서로 페이지 단위 순회.
+
+        fields를 지정하면 해당 payload 필드만, with_vectors=False면 벡터 없이 가져온다
+        (반환되는 청크에는 요청한 필드만 채워짐).
+        """
+        await self._init_collection()
+
+        offset = None
+        while True:
+            points, offset = await self.client.scroll(
+                collection_name=self.collection_name,
+                limit=page_size,
+                offset=offset,
+                with_payload=fields or True,
+                with_vectors=with_vectors,
+            )
+            for point in points:
+                yield _chunk_from_point(point.payload, point.vector)
+            if offset is None:
+                break
+
+    async def load_session(
+        self,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+        with_vectors: bool = True,
+    ) -> List[SemanticChunk]:
+        """세션 데이터 로드 (limit이 None이면 전체)."""
+        chunks: List[SemanticChunk] = []
+        page_size = min(limit, 256) if limit else 256
+        try:
+            async for chunk in self.iter_session(page_size, fields, with_vectors):
+                chunks.append(chunk)
+                if limit is not None and len(chunks) >= limit:
+                    break
             return chunks
         except Exception as e:
-            print(f"⚠️ 세션 데이터 로드 실패 (컬렉션이 없거나 비어있음): {str(e)}")
+            logger.warning("⚠️ 세션 데이터 로드 실패 (컬렉션이 없거나 비어있음): %s", e)
             return []
@@ -1,4 +1,5 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Set
+import heapq
 from src.core.models import SemanticChunk, IRerankingService
 
 
@@ -13,28 +14,33 @@ class CrossEncoderRerankingAdapter(IRerankingService):
         self, query: str, chunks: List[SemanticChunk], k: int = 5
     ) -> Dict[str, Any]:
         """청크 리랭킹."""
-        # Cross-encoder 스코어링
-        scored_chunks = []
-        for chunk in chunks:
-            score = self._calculate_relevance(query, chunk.content)
-            scored_chunks.append((chunk, score))
+        # Cross-encoder 스코어링 (모든 (쿼리, 청크) 쌍을 한 번에 채점)
+        scores = self._score_batch(query, chunks)
 
-        # 스코어로 정렬
-        scored_chunks.sort(key=lambda x: x[1], reverse=True)
+        # 상위 k개만 선택 (동점은 입력 순서 유지)
+        top = heapq.nlargest(k, range(len(chunks)), key=scores.__getitem__)
 
         return {
-            "chunks": [c[0] for c in scored_chunks[:k]],
-            "scores": [c[1] for c in scored_chunks[:k]],
+            "chunks": [chunks[i] for i in top],
+            "scores": [scores[i] for i in top],
         }
 
-    def _calculate_relevance(self, query: str, content: str) -> float:
-        """관련성 점수 계산."""
-        # 실제 cross-encoder 구현 필요
+    def _score_batch(self, query: str, chunks: List[SemanticChunk]) -> List[float]:
+        """(쿼리, 청크) 쌍 일괄 채점.
+
+        실제 cross-encoder 연결 시 이 메서드에서 model.predict(pairs, batch_size=...)로
+        한 번의 배치 추론을 수행한다.
+        """
+        # 쿼리 토큰화는 청크마다 반복하지 않고 한 번만 수행
         query_terms = set(query.lower().split())
-        content_terms = set(content.lower().split())
+        return [self._calculate_relevance(query_terms, chunk.content) for chunk in chunks]
 
+    def _calculate_relevance(self, query_terms: Set[str], content: str) -> float:
+        """관련성 점수 계산."""
+        # 실제 cross-encoder 구현 필요
         if not query_terms:
             return 0.0
 
+        content_terms = set(content.lower().split())
         overlap = len(query_terms & content_terms)
         return overlap / len(query_terms)
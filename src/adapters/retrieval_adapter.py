@@ -1,147 +1,231 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import heapq
 import re
 import math
-from collections import Counter
+import threading
+from operator import itemgetter
+from collections import Counter, OrderedDict, defaultdict
+import numpy as np
 from src.core.models import SemanticChunk, IRetrievalService, IVectorStore
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# 알파벳, 숫자, 한글로 이루어진 2글자 이상 토큰
+_TOKEN_RE = re.compile(r'[a-zA-Z0-9가-힣]{2,}')
+
+
+class BM25Index:
+    """추가 전용(append-only) BM25 역색인.
+
+    문서 길이, 전체 토큰 수, 토큰별 posting(문서 번호, 토큰 빈도)을 문서 추가 시점에
+    갱신하므로 쿼리 시에는 쿼리 토큰의 posting만 읽어 점수를 계산한다.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        # 토큰 -> (문서 번호 목록, 토큰 빈도 목록)
+        self._postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        # 토큰 -> posting의 NumPy 배열 (해당 토큰이 포함된 문서가 추가되면 무효화)
+        self._posting_arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._doc_lengths = np.empty(1024, dtype=np.float32)
+        self._num_docs = 0
+        self._total_tokens = 0
+
+    def __len__(self) -> int:
+        return self._num_docs
+
+    def add(self, tokens: List[str]) -> int:
+        """문서 토큰 추가 후 문서 번호 반환."""
+        doc_id = self._num_docs
+        if doc_id == len(self._doc_lengths):
+            # 용량을 두 배로 늘려 추가 비용을 상각
+            self._doc_lengths = np.resize(self._doc_lengths, 2 * len(self._doc_lengths))
+        self._doc_lengths[doc_id] = len(tokens)
+        self._num_docs += 1
+        self._total_tokens += len(tokens)
+
+        for token, count in Counter(tokens).items():
+            posting = self._postings.setdefault(token, ([], []))
+            posting[0].append(doc_id)
+            posting[1].append(count)
+            self._posting_arrays.pop(token, None)
+        return doc_id
+
+    def _posting_array(self, token: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """토큰 posting을 NumPy 배열로 반환 (캐시)."""
+        arrays = self._posting_arrays.get(token)
+        if arrays is None:
+            posting = self._postings.get(token)
+            if posting is None:
+                return None
+            arrays = (
+                np.asarray(posting[0], dtype=np.int64),
+                np.asarray(posting[1], dtype=np.float32),
+            )
+            self._posting_arrays[token] = arrays
+        return arrays
+
+    def score(self, query_tokens: List[str]) -> np.ndarray:
+        """전체 문서에 대한 BM25 점수 (쿼리 토큰이 등장하는 문서만 계산)."""
+        N = self._num_docs
+        scores = np.zeros(N, dtype=np.float32)
+        if N == 0 or self._total_tokens == 0:
+            return scores
+
+        k1, b = self.k1, self.b
+        avgdl = self._total_tokens / N
+        doc_lengths = self._doc_lengths[:N]
+
+        for token in query_tokens:
+            arrays = self._posting_array(token)
+            if arrays is None:
+                continue
+            docs, tf = arrays
+            df = len(docs)  # document frequency
+            idf = math.log((N - df + 0.5) / (df + 0.5))
+
+            # BM25 공식
+            length_norm = k1 * (1 - b + b * (doc_lengths[docs] / avgdl))
+            scores[docs] += idf * tf * (k1 + 1) / (tf + length_norm)
+        return scores
 
 
 class HybridRetrievalAdapter(IRetrievalService):
     """하이브리드 검색 어댑터 - IRetrievalService 구현."""
 
-    def __init__(self, vector_store: IVectorStore, llm_service=None):
+    def __init__(self, vector_store: IVectorStore, llm_service=None, embedding_cache_size: int = 1024):
         self.vector_store = vector_store
         self.llm_service = llm_service  # LLM 서비스 (임베딩 생성용)
+        # 쿼리 임베딩 LRU 캐시 (동일 쿼리 재검색 시 임베딩 API 호출 생략)
+        self.embedding_cache_size = embedding_cache_size
+        self._embedding_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        # BM25 역색인 (vector_store.chunks와 같은 순서로 색인)
+        self.bm25_index = BM25Index()
+        self._indexed_chunks: Optional[List[SemanticChunk]] = None
+        # 스레드에서 실행되는 BM25 검색 간 역색인 갱신 보호
+        self._bm25_lock = threading.Lock()
+
+    async def retrieve(
+        self, query: str, k: int = 20, query_embedding: Optional[List[float]] = None
+    ) -> List[SemanticChunk]:
+        """하이브리드 검색 수행 (query_embedding이 주어지면 임베딩 생성 생략)."""
+        # 1. BM25 검색은 임베딩과 무관하므로 임베딩 생성과 동시에 시작
+        bm25_task = asyncio.create_task(self._bm25_search(query, k))
+
+        # 2. 임베딩 생성 (파이프라인에서 미리 계산한 경우 재사용)
+        if query_embedding is None:
+            query_embedding = await self._embed_query(query)
+
+        # 3. 벡터 검색 (BM25 결과와 함께 대기)
+        vector_results, keyword_results = await asyncio.gather(
+            self.vector_store.search(query_embedding, k), bm25_task
+        )
+
+        # 4. RRF 융합
+        combined = self._reciprocal_rank_fusion(
+            vector_results, keyword_results, top_k=k
+        )
+
+        return [item["chunk"] for item in combined]
+
+    async def _embed_query(self, query: str) -> List[float]:
+        """쿼리 임베딩 생성 (LRU 캐시, 실패 시 더미 임베딩)."""
+        cached = self._embedding_cache.get(query)
+        if cached is not None:
+            self._embedding_cache.move_to_end(query)
+            return cached
 
-    async def retrieve(self, query: str, k: int = 20) -> List[SemanticChunk]:
-        """하이브리드 검색 수행."""
-        # 1. 임베딩 생성
         if self.llm_service:
             try:
                 embeddings = await self.llm_service.get_embeddings([query])
                 query_embedding = embeddings[0]
-                print(f"🔮 쿼리 임베딩 생성 완료: {len(query_embedding)}차원")
+                logger.debug("🔮 쿼리 임베딩 생성 완료: %d차원", len(query_embedding))
+                # 더미 임베딩은 캐시하지 않아 다음 호출에서 재시도
+                self._embedding_cache[query] = query_embedding
+                if len(self._embedding_cache) > self.embedding_cache_size:
+                    self._embedding_cache.popitem(last=False)
+                return query_embedding
             except Exception as e:
-                print(f"❌ 쿼리 임베딩 생성 실패: {str(e)}")
-                query_embedding = [0.1] * 1024  # 더미 임베딩 (1024차원)
-        else:
-            query_embedding = [0.1] * 1024  # 더미 임베딩 (1024차원)
-
-        # 2. 벡터 검색
-        vector_results = await self.vector_store.search(query_embedding, k)
-
-        # 3. BM25 검색 (간단한 구현)
-        keyword_results = await self._bm25_search(query, k)
-
-        # 4. RRF 융합
-        combined = self._reciprocal_rank_fusion(vector_results, keyword_results)
-
-        return [item["chunk"] for item in combined[:k]]
+                logger.error("❌ 쿼리 임베딩 생성 실패: %s", e)
+        return [0.1] * 1024  # 더미 임베딩 (1024차원)
 
     async def _bm25_search(self, query: str, k: int) -> List[Dict[str, Any]]:
-        """BM25 기반 검색."""
+        """BM25 기반 검색 (CPU 작업은 이벤트 루프 밖 스레드에서 수행)."""
+        return await asyncio.to_thread(self._bm25_search_sync, query, k)
+
+    def _bm25_search_sync(self, query: str, k: int) -> List[Dict[str, Any]]:
+        """BM25 기반 검색 (역색인 + NumPy 벡터 연산)."""
         # Vector store에서 모든 chunks 가져오기
-        if not hasattr(self.vector_store, 'chunks'):
-            return []
-        
-        chunks = getattr(self.vector_store, 'chunks', [])
+        chunks = self.vector_store.snapshot()
         
         # 쿼리 토큰화
         query_tokens = self._tokenize(query.lower())
         if not query_tokens:
             return []
         
-        # 문서별 토큰화 및 통계 계산
-        documents = []
-        doc_lengths = []
-        
-        for chunk in chunks:
-            tokens = self._tokenize(chunk.content.lower())
-            documents.append(tokens)
-            doc_lengths.append(len(tokens))
-        
-        if not documents:
+        with self._bm25_lock:
+            # 새로 추가된 청크만 토큰화하여 역색인 갱신
+            self._sync_bm25_index(chunks)
+            scores = self.bm25_index.score(query_tokens)
+        N = len(scores)
+        if N == 0:
             return []
         
-        # 평균 문서 길이
-        avgdl = sum(doc_lengths) / len(doc_lengths)
-        
-        # 각 쿼리 토큰이 등장하는 문서 수 계산 (IDF 계산용)
-        df = {}  # document frequency
-        for tokens in documents:
-            unique_tokens = set(tokens)
-            for token in query_tokens:
-                if token in unique_tokens:
-                    df[token] = df.get(token, 0) + 1
-        
-        # BM25 파라미터
-        k1 = 1.2
-        b = 0.75
-        N = len(documents)
-        
-        scores = []
-        
-        for i, tokens in enumerate(documents):
-            score = 0.0
-            token_counts = Counter(tokens)
-            doc_len = doc_lengths[i]
-            
-            for token in query_tokens:
-                if token in token_counts:
-                    tf = token_counts[token]  # term frequency
-                    idf = math.log((N - df.get(token, 0) + 0.5) / (df.get(token, 0) + 0.5))
-                    
-                    # BM25 공식
-                    numerator = idf * tf * (k1 + 1)
-                    denominator = tf + k1 * (1 - b + b * (doc_len / avgdl))
-                    score += numerator / denominator
-            
-            scores.append((i, score))
-        
-        # 점수순으로 정렬
-        scores.sort(key=lambda x: x[1], reverse=True)
+        # 점수순으로 상위 k개 선택 (동점은 문서 순서 유지)
+        if k < N:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(N)
+        top = top[np.lexsort((top, -scores[top]))]
         
-        # 상위 k개 결과 반환
-        results = []
-        for i, score in scores[:k]:
-            if score > 0:  # 점수가 0보다 큰 경우만
-                results.append({
-                    "chunk": chunks[i],
-                    "score": score
-                })
+        # 점수가 0보다 큰 경우만 반환
+        return [
+            {"chunk": chunks[i], "score": float(scores[i])}
+            for i in top
+            if scores[i] > 0
+        ]
+
+    def _sync_bm25_index(self, chunks: List[SemanticChunk]) -> None:
+        """벡터 저장소 청크 목록과 역색인 동기화 (추가분만 토큰화)."""
+        if chunks is not self._indexed_chunks or len(chunks) < len(self.bm25_index):
+            # 저장소가 초기화(clear)되었으면 처음부터 다시 색인
+            self._indexed_chunks = chunks
+            self.bm25_index = BM25Index()
         
-        return results
+        for doc_id in range(len(self.bm25_index), len(chunks)):
+            self.bm25_index.add(self._tokenize(chunks[doc_id].content.lower()))
     
     def _tokenize(self, text: str) -> List[str]:
         """텍스트 토큰화 (간단한 구현)."""
-        # 알파벳, 숫자, 한글만 추출하고 소문자로 변환
-        tokens = re.findall(r'[a-zA-Z0-9가-힣]+', text)
-        # 2글자 이상인 토큰만 반환
-        return [token for token in tokens if len(token) >= 2]
+        return _TOKEN_RE.findall(text)
 
     def _reciprocal_rank_fusion(
-        self, vector_results: List[Dict], keyword_results: List[Dict], k: int = 60
+        self,
+        vector_results: List[Dict],
+        keyword_results: List[Dict],
+        k: int = 60,
+        top_k: Optional[int] = None,
     ) -> List[Dict]:
-        """RRF를 사용한 결과 융합."""
-        scores = {}
+        """RRF를 사용한 결과 융합 (점수 계산과 청크 매핑을 한 번의 순회로 처리)."""
+        scores: Dict[str, float] = defaultdict(float)
+        chunk_map: Dict[str, Dict] = {}
 
         for rank, item in enumerate(vector_results):
             chunk_id = item["chunk"].chunk_id
-            scores[chunk_id] = scores.get(chunk_id, 0) + 1 / (k + rank + 1)
+            scores[chunk_id] += 1 / (k + rank + 1)
+            chunk_map[chunk_id] = item
 
         for rank, item in enumerate(keyword_results):
             chunk_id = item["chunk"].chunk_id
-            scores[chunk_id] = scores.get(chunk_id, 0) + 1 / (k + rank + 1)
-
-        # 결과 정렬 및 반환
-        sorted_chunks = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+            scores[chunk_id] += 1 / (k + rank + 1)
+            chunk_map[chunk_id] = item
 
-        chunk_map = {
-            item["chunk"].chunk_id: item for item in vector_results + keyword_results
-        }
-
-        result = []
-        for chunk_id, score in sorted_chunks:
-            if chunk_id in chunk_map:
-                result.append(chunk_map[chunk_id])
-
-        return result
+        # 결과 정렬 및 반환 (top_k가 주어지면 전체 정렬 없이 상위 항목만 선택)
+        if top_k is None:
+            ranked = sorted(scores.items(), key=itemgetter(1), reverse=True)
+        else:
+            ranked = heapq.nlargest(top_k, scores.items(), key=itemgetter(1))
+        return [chunk_map[chunk_id] for chunk_id, _ in ranked]
@@ -1,52 +1,171 @@
 from typing import List, Dict, Any
+import asyncio
 import numpy as np
 import faiss
 from src.core.models import SemanticChunk, IVectorStore
 
+# 이 개수 이상이 되면 전수 탐색(Flat) 대신 HNSW 근사 탐색 인덱스로 전환
+HNSW_MIN_VECTORS = 2000
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+# 이 개수 이상이 되면 PQ 압축 코드로 탐색하는 IVFPQ 인덱스로 전환
+IVFPQ_MIN_VECTORS = 10_000
+IVFPQ_NLIST = 64
+IVFPQ_NPROBE = 8
+PQ_M = 64
+PQ_NBITS = 8
+# IVFPQ 후보를 k * RERANK_FACTOR개 뽑아 8비트 스칼라 양자화 벡터로 재채점
+RERANK_FACTOR = 4
+
+
+def _build_hnsw_index(dimension: int) -> faiss.Index:
+    """내적(코사인) 기반 HNSW 인덱스 생성."""
+    index = faiss.IndexHNSWFlat(dimension, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+    index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    index.hnsw.efSearch = HNSW_EF_SEARCH
+    return index
+
+
+def _build_ivfpq_index(dimension: int, vectors: np.ndarray) -> faiss.Index:
+    """재채점(refine)을 포함한 내적 기반 IVFPQ 인덱스 생성, 학습 및 벡터 추가.
+
+    재채점용 벡터는 float32 원본 대신 8비트 스칼라 양자화(SQ8)로 보관하여
+    벡터당 메모리를 4 * dimension 바이트에서 dimension 바이트로 줄인다.
+    """
+    quantizer = faiss.IndexFlatIP(dimension)
+    ivfpq = faiss.IndexIVFPQ(
+        quantizer, dimension, IVFPQ_NLIST, PQ_M, PQ_NBITS, faiss.METRIC_INNER_PRODUCT
+    )
+    ivfpq.nprobe = IVFPQ_NPROBE
+    refine = faiss.IndexScalarQuantizer(
+        dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+    )
+    index = faiss.IndexRefine(ivfpq, refine)
+    index.k_factor = RERANK_FACTOR
+    index.train(vectors)
+    index.add(vectors)
+    return index
+
 
 class FAISSVectorStore(IVectorStore):
-    """FAISS 인메모리 벡터 저장소 - IVectorStore 구현."""
+    """FAISS 인메모리 벡터 저장소 - IVectorStore 구현.
+
+    벡터를 L2 정규화하여 내적(IndexFlatIP)으로 검색하므로 점수는 코사인 유사도이며
+    (높을수록 유사), Qdrant 영구 저장소의 COSINE 거리와 일치한다.
+    벡터 수가 적을 때는 IndexFlatIP로 전수 탐색하고, HNSW_MIN_VECTORS개를 넘으면
+    IndexHNSWFlat으로, IVFPQ_MIN_VECTORS개를 넘으면 IVFPQ(+ SQ8 벡터 재채점)로
+    한 번씩 재구성한다.
+    인덱스 추가/재구성은 이벤트 루프를 막지 않도록 스레드에서 실행하며,
+    그동안 검색이 인덱스 변경과 겹치지 않도록 Lock으로 직렬화한다.
+    오래 걸리는 IVFPQ 학습은 Lock 밖에서 수행하고 완성된 인덱스만 교체한다.
+    """
 
     def __init__(self, dimension: int = 768):
         self.dimension = dimension
-        self.index = faiss.IndexFlatL2(dimension)
+        self.index = faiss.IndexFlatIP(dimension)
         self.chunks: List[SemanticChunk] = []
+        self._lock = asyncio.Lock()
+        self._upgrading = False
 
     async def add_chunks(self, chunks: List[SemanticChunk]) -> None:
-        """청크 벡터 추가."""
-        embeddings = []
-        for chunk in chunks:
-            if chunk.embedding:
-                embeddings.append(chunk.embedding)
-                self.chunks.append(chunk)
+        """청크 벡터 추가 (연속된 float32 행렬 하나로 변환하여 한 번에 add)."""
+        valid = [chunk for chunk in chunks if chunk.embedding]
+        if valid:
+            # 행마다 복사하지 않고 리스트 전체를 한 번의 C 변환으로 (N, dimension) 행렬화
+            vectors = np.array([chunk.embedding for chunk in valid], dtype=np.float32)
+            if vectors.shape[1] != self.dimension:
+                raise ValueError(
+                    f"임베딩 차원 불일치: {vectors.shape[1]} != {self.dimension}"
+                )
+            faiss.normalize_L2(vectors)
+            async with self._lock:
+                await asyncio.to_thread(self._add_vectors, vectors)
+                self.chunks.extend(valid)
+            if self._needs_ivfpq() and not self._upgrading:
+                await self._upgrade_to_ivfpq()
+
+    def _add_vectors(self, vectors: np.ndarray) -> None:
+        """인덱스에 벡터 추가 후 필요하면 HNSW로 재구성 (스레드에서 실행, Lock 보유 중)."""
+        self.index.add(vectors)
+        ntotal = self.index.ntotal
+        if isinstance(self.index, faiss.IndexFlat) and ntotal >= HNSW_MIN_VECTORS:
+            # 청크 순서(= 인덱스 내 위치)를 그대로 유지하며 옮김
+            new_index = _build_hnsw_index(self.dimension)
+            new_index.add(self.index.reconstruct_n(0, ntotal))
+            self.index = new_index
 
-        if embeddings:
-            vectors = np.array(embeddings, dtype=np.float32)
-            self.index.add(vectors)
+    def _needs_ivfpq(self) -> bool:
+        """HNSW 인덱스가 IVFPQ 전환 임계값을 넘었는지 (PQ 분할이 가능한 차원만)."""
+        return (
+            isinstance(self.index, faiss.IndexHNSW)
+            and self.index.ntotal >= IVFPQ_MIN_VECTORS
+            and self.dimension % PQ_M == 0
+        )
+
+    async def _upgrade_to_ivfpq(self) -> None:
+        """HNSW 인덱스를 IVFPQ로 재구성.
+
+        학습/추가는 Lock 없이 스냅샷 벡터로 수행하여 그동안 검색/추가가 기존 인덱스로
+        계속 진행되고, 교체 시점에 그 사이 추가된 벡터만 옮긴 뒤 인덱스를 바꾼다.
+        """
+        self._upgrading = True
+        try:
+            async with self._lock:
+                old_index = self.index
+                ntotal = old_index.ntotal
+                vectors = await asyncio.to_thread(old_index.reconstruct_n, 0, ntotal)
+
+            new_index = await asyncio.to_thread(_build_ivfpq_index, self.dimension, vectors)
+
+            async with self._lock:
+                if self.index is not old_index:
+                    # 재구성 중 clear()된 경우 버림
+                    return
+                if old_index.ntotal > ntotal:
+                    delta = old_index.reconstruct_n(ntotal, old_index.ntotal - ntotal)
+                    await asyncio.to_thread(new_index.add, delta)
+                self.index = new_index
+        finally:
+            self._upgrading = False
 
     async def search(
         self, query_embedding: List[float], k: int = 10
     ) -> List[Dict[str, Any]]:
-        """유사도 기반 검색."""
+        """코사인 유사도 기반 검색."""
         if not self.chunks:
             return []
             
-        query_vector = np.array([query_embedding], dtype=np.float32)
-        actual_k = min(k, len(self.chunks))
-        if actual_k <= 0:
-            return []
-            
-        distances, indices = self.index.search(query_vector, actual_k)
+        query_vector = np.asarray([query_embedding], dtype=np.float32)
+        faiss.normalize_L2(query_vector)
+        # 인덱스 추가/재구성 중에는 끝날 때까지 대기 (인덱스와 청크 목록 일관성 유지)
+        async with self._lock:
+            actual_k = min(k, len(self.chunks))
+            if actual_k <= 0:
+                return []
+
+            distances, indices = self.index.search(query_vector, actual_k)
+            chunks = self.chunks
 
         results = []
         for i, idx in enumerate(indices[0]):
-            if idx < len(self.chunks):
+            # HNSW는 후보가 부족하면 -1을 반환
+            if 0 <= idx < len(chunks):
                 results.append(
-                    {"chunk": self.chunks[idx], "score": float(distances[0][i])}
+                    {"chunk": chunks[idx], "score": float(distances[0][i])}
                 )
         return results
 
+    def snapshot(self) -> List[SemanticChunk]:
+        """저장된 청크 목록 (복사하지 않음, 인덱스 내 위치와 같은 순서)."""
+        return self.chunks
+
     async def clear(self) -> None:
-        """저장소 초기화."""
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self.chunks = []
+        """저장소 초기화 (Flat 인덱스는 reset()으로 기존 벡터 버퍼를 재사용)."""
+        async with self._lock:
+            if isinstance(self.index, faiss.IndexFlat):
+                self.index.reset()
+            else:
+                # HNSW/IVFPQ로 전환된 인덱스는 작은 규모용 Flat 인덱스로 되돌림
+                self.index = faiss.IndexFlatIP(self.dimension)
+            self.chunks = []
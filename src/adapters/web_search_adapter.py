@@ -1,10 +1,49 @@
-from typing import List
+from typing import List, Optional
 import httpx
 from src.core.models import WebDocument, IWebSearchService
 from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# 검색 요청 간 공유하는 HTTP/2 클라이언트 (TCP/TLS 연결 재사용)
+_CLIENT: Optional[httpx.AsyncClient] = None
+# 공유 클라이언트를 사용 중인 소유자(컨테이너) 수 (마지막 소유자가 반환할 때 종료)
+_CLIENT_REFS = 0
+
+
+def _get_client() -> httpx.AsyncClient:
+    """공유 httpx.AsyncClient 반환 (최초 호출 시 생성)."""
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        _CLIENT = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+            timeout=httpx.Timeout(10.0),
+        )
+    return _CLIENT
+
+
+def acquire_client() -> None:
+    """공유 클라이언트 사용 등록 (검색 어댑터를 만드는 쪽에서 호출)."""
+    global _CLIENT_REFS
+    _CLIENT_REFS += 1
+
+
+async def release_client() -> None:
+    """공유 클라이언트 사용 해제 (다른 소유자가 남아 있으면 닫지 않음)."""
+    global _CLIENT_REFS
+    _CLIENT_REFS = max(_CLIENT_REFS - 1, 0)
+    if _CLIENT_REFS == 0:
+        await close_client()
+
+
+async def close_client() -> None:
+    """공유 클라이언트 종료 (프로세스 종료 시 호출, 소유자 수와 무관하게 닫음)."""
+    global _CLIENT
+    if _CLIENT is not None:
+        await _CLIENT.aclose()
+        _CLIENT = None
+
 
 class TavilySearchAdapter(IWebSearchService):
     """Tavily 검색 API 어댑터 - IWebSearchService 구현."""
@@ -15,47 +54,47 @@ class TavilySearchAdapter(IWebSearchService):
 
     async def search(self, query: str, max_results: int = 7) -> List[WebDocument]:
         """Tavily API를 사용한 검색."""
-        async with httpx.AsyncClient() as client:
-            payload = {
-                "api_key": self.api_key,
-                "query": query,
-                "search_depth": "basic",
-                "include_answer": False,
-                "include_images": False,
-                "include_raw_content": False,
-                "max_results": max_results
-            }
-            
-            logger.debug(f"🔍 Tavily 검색 요청: {query}")
-            
-            response = await client.post(
-                self.base_url,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-            )
-            
-            logger.debug(f"📡 Tavily 응답 상태: {response.status_code}")
-            response_data = response.json()
-            logger.debug(f"📄 Tavily 응답 데이터: {response_data}")
-            
-            response.raise_for_status()
-            
-            # 응답 파싱
-            results = []
-            tavily_results = response_data.get("results", [])
-            logger.info(f"📊 Tavily 검색 결과: {len(tavily_results)}개 문서 발견")
-            
-            for i, item in enumerate(tavily_results[:max_results]):
-                logger.debug(f"  결과 {i+1}: {item.get('title', 'No Title')}")
-                results.append(
-                    WebDocument(
-                        url=item["url"],
-                        title=item.get("title", "No Title"),
-                        snippet=item.get("content", "No Content"),
-                        search_query=query,
-                    )
+        client = _get_client()
+        payload = {
+            "api_key": self.api_key,
+            "query": query,
+            "search_depth": "basic",
+            "include_answer": False,
+            "include_images": False,
+            "include_raw_content": False,
+            "max_results": max_results
+        }
+        
+        logger.debug("🔍 Tavily 검색 요청: %s", query)
+        
+        response = await client.post(
+            self.base_url,
+            json=payload,
+            headers={"Content-Type": "application/json"},
+        )
+        
+        logger.debug("📡 Tavily 응답 상태: %d", response.status_code)
+        response_data = response.json()
+        logger.debug("📄 Tavily 응답 데이터: %s", response_data)
+        
+        response.raise_for_status()
+        
+        # 응답 파싱
+        results = []
+        tavily_results = response_data.get("results", [])
+        logger.info("📊 Tavily 검색 결과: %d개 문서 발견", len(tavily_results))
+        
+        for i, item in enumerate(tavily_results[:max_results]):
+            logger.debug("  결과 %d: %s", i + 1, item.get("title", "No Title"))
+            results.append(
+                WebDocument(
+                    url=item["url"],
+                    title=item.get("title", "No Title"),
+                    snippet=item.get("content", "No Content"),
+                    search_query=query,
                 )
-            return results
+            )
+        return results
 
 
 class GoogleSearchAdapter(IWebSearchService):
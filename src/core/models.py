@@ -1,7 +1,7 @@
 """Core domain models and port interfaces for WebSearch QA System."""
 
 from datetime import datetime
-from typing import List, Optional, Dict, Any, Protocol
+from typing import AsyncIterator, List, Optional, Dict, Any, Protocol
 from pydantic import BaseModel, Field
 from abc import ABC, abstractmethod
 import uuid
@@ -80,10 +80,28 @@ class ILLMService(ABC):
         pass
 
     @abstractmethod
-    async def generate_answer(self, query: str, context: str) -> str:
+    async def generate_answer(
+        self, query: str, context: str, max_tokens: int = 1024
+    ) -> str:
         """답변 생성."""
         pass
 
+    async def stream_answer(
+        self, query: str, context: str, max_tokens: int = 1024
+    ) -> AsyncIterator[str]:
+        """답변을 토큰 단위로 스트리밍 (기본 구현은 전체 답변을 한 번에 반환)."""
+        yield await self.generate_answer(query, context, max_tokens=max_tokens)
+
+    @abstractmethod
+    async def generate_batch(
+        self,
+        prompts: List[str],
+        max_tokens: int = 128,
+        stop: Optional[List[str]] = None,
+    ) -> List[str]:
+        """여러 프롬프트에 대한 배치 텍스트 생성."""
+        pass
+
     @abstractmethod
     async def get_embeddings(self, texts: List[str]) -> List[List[float]]:
         """임베딩 생성."""
@@ -124,6 +142,11 @@ class IVectorStore(ABC):
         """유사도 검색."""
         pass
 
+    @abstractmethod
+    def snapshot(self) -> List[SemanticChunk]:
+        """현재 저장된 청크 목록 (추가 순서, 호출자는 수정하지 않음)."""
+        pass
+
     @abstractmethod
     async def clear(self) -> None:
         """저장소 초기화."""
@@ -134,13 +157,28 @@ class IPersistentStore(ABC):
     """영구 저장소 인터페이스."""
 
     @abstractmethod
-    async def save_session(self, chunks: List[SemanticChunk]) -> None:
-        """세션 데이터 저장."""
+    async def save_session(self, chunks: List[SemanticChunk], wait: bool = False) -> None:
+        """세션 데이터 저장 (wait=True면 조회 가능해질 때까지 대기, 실패 시 예외 발생)."""
+        pass
+
+    @abstractmethod
+    def iter_session(
+        self,
+        page_size: int = 256,
+        fields: Optional[List[str]] = None,
+        with_vectors: bool = True,
+    ) -> AsyncIterator[SemanticChunk]:
+        """세션 데이터를 페이지 단위로 순회 (async generator)."""
         pass
 
     @abstractmethod
-    async def load_session(self, limit: int = 1000) -> List[SemanticChunk]:
-        """세션 데이터 로드."""
+    async def load_session(
+        self,
+        limit: Optional[int] = None,
+        fields: Optional[List[str]] = None,
+        with_vectors: bool = True,
+    ) -> List[SemanticChunk]:
+        """세션 데이터 로드 (limit이 None이면 전체, fields로 payload 필드 선택)."""
         pass
 
 
@@ -159,8 +197,10 @@ class IRetrievalService(ABC):
     """검색 서비스 인터페이스."""
 
     @abstractmethod
-    async def retrieve(self, query: str, k: int = 20) -> List[SemanticChunk]:
-        """관련 청크 검색."""
+    async def retrieve(
+        self, query: str, k: int = 20, query_embedding: Optional[List[float]] = None
+    ) -> List[SemanticChunk]:
+        """관련 청크 검색 (query_embedding이 주어지면 임베딩 생성 생략)."""
         pass
 
 
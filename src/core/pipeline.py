@@ -1,7 +1,16 @@
 import asyncio
-from typing import TypedDict, List, Annotated, Sequence
-from datetime import datetime
-from langgraph.graph import StateGraph, END
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from typing import TypedDict, Any, Dict, List, Annotated, Optional, Sequence, Tuple
+import numpy as np
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import StateGraph, START, END
+from langgraph.graph.state import CompiledStateGraph
 
 from .models import (
     SearchQuery,
@@ -20,25 +29,90 @@ from .models import (
 )
 from ..utils.logger import setup_logger
 
-logger = setup_logger(__name__)
+# 쿼리 처리 핫 패스이므로 stdout 쓰기는 큐 리스너 스레드에 맡김
+logger = setup_logger(__name__, queue_based=True)
+
+# 스트리밍 임베딩 마이크로 배치: 최대 청크 수 / 첫 청크 도착 후 최대 대기 시간(초)
+EMBED_BATCH_SIZE = 128
+EMBED_FLUSH_INTERVAL = 0.05
+# 텍스트(청크 내용, 사용자 질문) 해시 -> 임베딩 LRU 캐시 크기
+EMBEDDING_CACHE_SIZE = 10_000
+# 정규화한 사용자 질문 -> 생성된 검색 쿼리 LRU 캐시 크기
+QUERY_CACHE_SIZE = 1000
+# 하이브리드(RRF) 검색 상위 후보 중 리랭커에 넘길 개수 (리랭킹 비용은 후보 수에 비례)
+RERANK_CANDIDATES = 10
+# 이미 저장된 청크의 최고 코사인 유사도가 이 값 이상이면 웹 검색 단계를 건너뜀
+CACHE_HIT_MIN_SCORE = 0.85
+# 이번 실행에서 수집한 청크의 최고 코사인 유사도가 이 값 이상이면 전체 저장소 검색 생략
+FRESH_MATCH_MIN_SCORE = 0.75
+
+# 생성 중인 답변 토큰을 호출자(타임아웃 처리 등)와 공유하는 버퍼.
+# 호출자가 리스트를 설정하면 이후 생성되는 태스크들이 같은 리스트를 본다.
+partial_answer_buffer: ContextVar[Optional[List[str]]] = ContextVar(
+    "partial_answer_buffer", default=None
+)
+
+# URL 정규화 시 제거할 추적용 쿼리 파라미터
+_TRACKING_PARAMS = frozenset({"fbclid", "gclid"})
+
+
+def _normalize_url(url: str) -> str:
+    """URL 정규화 (scheme/host 소문자화, 추적 파라미터와 fragment 제거)."""
+    parts = urlsplit(url)
+    params = parse_qsl(parts.query, keep_blank_values=True)
+    kept = [
+        (key, value)
+        for key, value in params
+        if not key.startswith("utm_") and key not in _TRACKING_PARAMS
+    ]
+    # 제거할 파라미터가 없으면 원래 인코딩을 그대로 유지
+    query = parts.query if len(kept) == len(params) else urlencode(kept)
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path, query, "")
+    )
+
+
+def _content_key(content: str) -> bytes:
+    """임베딩 캐시 키 (청크 내용의 128비트 blake2b 다이제스트)."""
+    return hashlib.blake2b(content.encode(), digest_size=16).digest()
 
 
 class PipelineState(TypedDict):
     """파이프라인 상태 정의."""
 
     user_query: str
+    query_embedding: Optional[List[float]]
+    cache_hit: bool
     search_queries: List[SearchQuery]
     web_documents: List[WebDocument]
     document_contents: List[WebDocumentContent]
     chunks: List[SemanticChunk]
     scratch_pad: ScratchPad
     response: QAResponse
-    start_time: float
+    start_time: float  # time.monotonic() 기준 시작 시각
+
+
+def _bind_node(method_name: str):
+    """실행 config의 파이프라인 인스턴스 메서드를 호출하는 그래프 노드 생성."""
+
+    async def node(state: PipelineState, config: RunnableConfig) -> dict:
+        pipeline = config["configurable"]["pipeline"]
+        return await getattr(pipeline, method_name)(state)
+
+    node.__name__ = method_name
+    return node
+
+
+def _route_cache_hit(state: PipelineState, config: RunnableConfig) -> str:
+    """캐시 적중 여부 라우팅 (실행 중인 파이프라인 인스턴스에 위임)."""
+    return config["configurable"]["pipeline"]._route_cache_hit(state)
 
 
 class QAPipeline:
     """웹 검색 기반 QA 파이프라인 - 인터페이스에만 의존."""
 
+    _graph: Optional[CompiledStateGraph] = None
+
     def __init__(
         self,
         llm_service: ILLMService,
@@ -57,42 +131,133 @@ class QAPipeline:
         self.chunking_service = chunking_service
         self.retrieval_service = retrieval_service
         self.reranking_service = reranking_service
-        self.graph = self._build_graph()
+        # 환경변수에서 동시 청킹 수 가져오기 (기본값: 2) - 실행마다 읽지 않도록 한 번만
+        self.max_concurrent_chunks = int(os.getenv("MAX_CONCURRENT_CHUNKS", "2"))
+        # 동일한 청크 내용/질문은 다시 임베딩하지 않도록 캐시
+        self._embedding_cache: "OrderedDict[bytes, List[float]]" = OrderedDict()
+        # 같은 질문은 검색 쿼리를 다시 생성하지 않도록 캐시
+        self._query_cache: "OrderedDict[str, List[SearchQuery]]" = OrderedDict()
+        # retrieve_chunks 전에 끝나야 하는 외부 작업 (예: 이전 세션 청크 로드)
+        self._retrieval_prerequisite: Optional["asyncio.Future[Any]"] = None
+        self.graph = self._get_graph()
+
+    def set_retrieval_prerequisite(self, future: "asyncio.Future[Any]") -> None:
+        """검색 단계 직전에 완료를 기다릴 작업 등록.
 
-    def _build_graph(self) -> StateGraph:
+        검색어 생성/웹 검색/크롤링 단계는 이 작업과 겹쳐 실행된다.
+        """
+        self._retrieval_prerequisite = future
+
+    @classmethod
+    def _get_graph(cls) -> CompiledStateGraph:
+        """컴파일된 워크플로우 반환 (클래스당 한 번만 컴파일).
+
+        그래프 구조는 주입된 서비스와 무관하므로 인스턴스마다 다시 컴파일하지 않고,
+        노드는 실행 config로 전달된 파이프라인 인스턴스의 메서드를 호출한다.
+        """
+        if cls.__dict__.get("_graph") is None:
+            cls._graph = cls._build_graph()
+        return cls._graph
+
+    @staticmethod
+    def _build_graph() -> CompiledStateGraph:
         """LangGraph 워크플로우 구성."""
         workflow = StateGraph(PipelineState)
 
         # 노드 추가
-        workflow.add_node("generate_queries", self.generate_search_queries)
-        workflow.add_node("search_web", self.search_web)
-        workflow.add_node("crawl_documents", self.crawl_documents)
-        workflow.add_node("chunk_documents", self.chunk_documents)
-        workflow.add_node("store_vectors", self.store_vectors)
-        workflow.add_node("retrieve_chunks", self.retrieve_chunks)
-        workflow.add_node("generate_answer", self.generate_answer)
+        workflow.add_node("generate_queries", _bind_node("generate_search_queries"))
+        workflow.add_node("embed_query", _bind_node("embed_query"))
+        workflow.add_node("lookup_cached_chunks", _bind_node("lookup_cached_chunks"))
+        workflow.add_node("search_web", _bind_node("search_web"))
+        workflow.add_node("ingest_documents", _bind_node("ingest_documents"))
+        workflow.add_node("retrieve_chunks", _bind_node("retrieve_chunks"))
+        workflow.add_node("generate_answer", _bind_node("generate_answer"))
 
         # 엣지 정의
-        workflow.set_entry_point("generate_queries")
-        workflow.add_edge("generate_queries", "search_web")
-        workflow.add_edge("search_web", "crawl_documents")
-        workflow.add_edge("crawl_documents", "chunk_documents")
-        workflow.add_edge("chunk_documents", "store_vectors")
-        workflow.add_edge("store_vectors", "retrieve_chunks")
+        # 쿼리 임베딩은 문서 수집/저장 경로와 의존성이 없으므로 시작 시점에 병렬 실행
+        workflow.add_edge(START, "generate_queries")
+        workflow.add_edge(START, "embed_query")
+        # 두 작업이 끝나면 저장된 청크로 답변 가능한지 확인 (fan-in)
+        workflow.add_edge(["generate_queries", "embed_query"], "lookup_cached_chunks")
+        # 캐시 적중 시 웹 검색/크롤링/청킹을 건너뛰고 바로 검색
+        workflow.add_conditional_edges(
+            "lookup_cached_chunks",
+            _route_cache_hit,
+            {"hit": "retrieve_chunks", "miss": "search_web"},
+        )
+        # 크롤링/청킹/저장은 하나의 노드 안에서 큐로 겹쳐 실행
+        workflow.add_edge("search_web", "ingest_documents")
+        workflow.add_edge("ingest_documents", "retrieve_chunks")
         workflow.add_edge("retrieve_chunks", "generate_answer")
         workflow.add_edge("generate_answer", END)
 
         return workflow.compile()
 
-    async def generate_search_queries(self, state: PipelineState) -> PipelineState:
-        """검색 질의 생성 (멀티 쿼리 재작성)."""
+    async def generate_search_queries(self, state: PipelineState) -> dict:
+        """검색 질의 생성 (멀티 쿼리 재작성).
+
+        embed_query와 같은 단계에서 병렬 실행되므로 변경한 키만 반환한다.
+        """
+        key = " ".join(state["user_query"].lower().split())
+        queries = self._query_cache.get(key)
+        if queries is not None:
+            self._query_cache.move_to_end(key)
+            logger.info("♻️  캐시된 검색 쿼리 재사용")
+            return {"search_queries": queries}
+
         queries = await self.llm_service.generate_queries(state["user_query"])
-        state["search_queries"] = queries
-        return state
+        # LLM 실패 시 어댑터가 돌려주는 원본 질문 하나짜리 폴백은 캐시하지 않음 (다음 요청에서 재시도)
+        if any(query.processed_queries != [state["user_query"]] for query in queries):
+            self._query_cache[key] = queries
+            if len(self._query_cache) > QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        return {"search_queries": queries}
+
+    async def embed_query(self, state: PipelineState) -> dict:
+        """사용자 질문 임베딩 (문서 수집 경로와 병렬 실행, 같은 질문은 캐시 재사용)."""
+        key = _content_key(state["user_query"])
+        cached = self._embedding_cache.get(key)
+        if cached is not None:
+            self._embedding_cache.move_to_end(key)
+            return {"query_embedding": cached}
+
+        try:
+            embeddings = await self.llm_service.get_embeddings([state["user_query"]])
+            self._embedding_cache[key] = embeddings[0]
+            if len(self._embedding_cache) > EMBEDDING_CACHE_SIZE:
+                self._embedding_cache.popitem(last=False)
+            return {"query_embedding": embeddings[0]}
+        except Exception as e:
+            # 검색 단계에서 다시 임베딩을 시도하도록 비워둠
+            logger.error("❌ 쿼리 임베딩 생성 실패: %s", e)
+            return {"query_embedding": None}
+
+    async def lookup_cached_chunks(self, state: PipelineState) -> dict:
+        """이전 질의로 저장된 청크 중 질문과 충분히 유사한 청크가 있는지 확인 (시맨틱 캐시).
+
+        세션 로드가 아직 끝나지 않았으면 그때까지 저장된 청크만으로 판단한다.
+        """
+        query_embedding = state.get("query_embedding")
+        if query_embedding is None:
+            return {"cache_hit": False}
+        try:
+            results = await self.vector_store.search(query_embedding, k=1)
+        except Exception as e:
+            logger.error("❌ 캐시 조회 실패: %s", e)
+            return {"cache_hit": False}
+
+        hit = bool(results) and results[0]["score"] >= CACHE_HIT_MIN_SCORE
+        if hit:
+            logger.info("⚡ 저장된 청크로 답변 (유사도 %.3f) - 웹 검색 생략", results[0]["score"])
+        return {"cache_hit": hit}
+
+    def _route_cache_hit(self, state: PipelineState) -> str:
+        """캐시 적중 여부에 따른 다음 노드 선택."""
+        return "hit" if state.get("cache_hit") else "miss"
 
     async def search_web(self, state: PipelineState) -> PipelineState:
         """웹 검색 (병렬 처리)."""
-        logger.info(f"🔍 검색 쿼리 개수: {len(state['search_queries'])}")
+        logger.info("🔍 검색 쿼리 개수: %d", len(state["search_queries"]))
         tasks = [
             self.search_service.search(query.processed_queries[0], max_results=7)
             for query in state["search_queries"]
@@ -102,120 +267,197 @@ class QAPipeline:
         all_documents = []
         for i, result in enumerate(results):
             if isinstance(result, list):
-                logger.info(f"  쿼리 {i+1}: {len(result)}개 문서 발견")
+                logger.info("  쿼리 %d: %d개 문서 발견", i + 1, len(result))
+                # 추적 파라미터 등으로 달라진 같은 문서 URL을 중복 제거할 수 있도록 정규화
+                for doc in result:
+                    doc.url = _normalize_url(doc.url)
                 all_documents.extend(result)
             elif isinstance(result, Exception):
-                logger.error(f"  쿼리 {i+1} 검색 실패: {str(result)}")
+                logger.error("  쿼리 %d 검색 실패: %s", i + 1, result)
         
-        logger.info(f"📑 총 {len(all_documents)}개 웹 문서 발견")
+        logger.info("📑 총 %d개 웹 문서 발견", len(all_documents))
         state["web_documents"] = all_documents
         return state
 
-    async def crawl_documents(self, state: PipelineState) -> PipelineState:
-        """문서 크롤링 (병렬 처리)."""
-        unique_urls = list({doc.url for doc in state["web_documents"]})
-        logger.info(f"🕷️  크롤링할 URL 개수: {len(unique_urls)}")
-        
+    async def ingest_documents(self, state: PipelineState) -> PipelineState:
+        """크롤링 → 청킹 → 임베딩/저장을 큐로 연결한 스트리밍 처리.
+
+        크롤링이 끝난 문서부터 바로 청킹하고, 청킹된 청크는 도착하는 대로 모아
+        임베딩/저장하므로 느린 사이트의 크롤링과 앞선 문서의 청킹·임베딩이 겹친다.
+        """
+        # 검색 결과 순서(관련도 순)를 유지하며 중복 제거
+        unique_urls = list(dict.fromkeys(doc.url for doc in state["web_documents"]))[:10]
+        logger.info("🕷️  크롤링할 URL 개수: %d", len(unique_urls))
+
+        state["document_contents"] = []
+        state["chunks"] = []
         if not unique_urls:
             logger.warning("⚠️  크롤링할 URL이 없습니다.")
-            state["document_contents"] = []
             return state
-            
-        tasks = [self.crawling_service.crawl(url) for url in unique_urls[:10]]
-        contents = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        successful_contents = []
-        for i, content in enumerate(contents):
-            if isinstance(content, WebDocumentContent):
-                logger.debug(f"  ✅ URL {i+1} 크롤링 성공: {unique_urls[i]}")
-                successful_contents.append(content)
-            else:
-                logger.error(f"  ❌ URL {i+1} 크롤링 실패: {unique_urls[i]} - {str(content)}")
-        
-        state["document_contents"] = successful_contents
-        logger.info(f"📄 성공적으로 크롤링된 문서: {len(successful_contents)}개")
-        return state
 
-    async def chunk_documents(self, state: PipelineState) -> PipelineState:
-        """문서 청킹 (제한된 병렬 처리 - 환경변수로 동시 실행 수 조절)."""
-        document_contents = state["document_contents"]
-        logger.info(f"📄 크롤링된 문서 개수: {len(document_contents)}")
-        
-        if not document_contents:
-            logger.warning("⚠️  청킹할 문서가 없습니다.")
-            state["chunks"] = []
-            return state
-        
-        # 환경변수에서 동시 실행 수 가져오기 (기본값: 2)
-        import os
-        max_concurrent_chunks = int(os.getenv("MAX_CONCURRENT_CHUNKS", "2"))
-        logger.info(f"🔧 최대 동시 청킹 문서 수: {max_concurrent_chunks}개")
-        
-        # Semaphore로 동시 실행 수 제한
-        semaphore = asyncio.Semaphore(max_concurrent_chunks)
-        
-        async def limited_chunk_document(content):
-            async with semaphore:
-                logger.debug(f"🔧 문서 청킹 시작: {content.url}")
-                return await self.chunking_service.chunk_document(content, state["user_query"])
-        
-        # 제한된 병렬로 청킹 작업 수행
-        tasks = [limited_chunk_document(content) for content in document_contents]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        all_chunks = []
-        for i, result in enumerate(results):
-            if isinstance(result, list):
-                logger.debug(f"  ✅ 문서 {i+1} 청킹 성공: {len(result)}개 chunk 생성")
-                all_chunks.extend(result)
-            elif isinstance(result, Exception):
-                logger.error(f"  ❌ 문서 {i+1} 청킹 실패: {str(result)}")
-        
-        state["chunks"] = all_chunks
-        logger.info(f"📊 총 {len(all_chunks)}개 chunk 생성 완료")
+        max_concurrent_chunks = self.max_concurrent_chunks
+        logger.info("🔧 최대 동시 청킹 문서 수: %d개", max_concurrent_chunks)
+
+        # None은 각 단계 워커의 종료 신호
+        crawl_queue: "asyncio.Queue[Optional[WebDocumentContent]]" = asyncio.Queue()
+        chunk_queue: "asyncio.Queue[Optional[List[SemanticChunk]]]" = asyncio.Queue()
+
+        async def crawl_one(i: int, url: str) -> Tuple[int, str, Any]:
+            try:
+                return i, url, await self.crawling_service.crawl(url)
+            except Exception as e:
+                return i, url, e
+
+        async def crawl_stage() -> None:
+            # 모든 크롤링을 즉시 시작하고, 끝나는 순서대로 청킹 큐에 전달
+            tasks = [
+                asyncio.create_task(crawl_one(i, url)) for i, url in enumerate(unique_urls)
+            ]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    i, url, content = await next_done
+                    if isinstance(content, WebDocumentContent):
+                        logger.debug("  ✅ URL %d 크롤링 성공: %s", i + 1, url)
+                        state["document_contents"].append(content)
+                        crawl_queue.put_nowait(content)
+                    else:
+                        logger.error("  ❌ URL %d 크롤링 실패: %s - %s", i + 1, url, content)
+            finally:
+                # 타임아웃 등으로 취소되면 남은 크롤링도 함께 취소
+                for task in tasks:
+                    task.cancel()
+            logger.info("📄 성공적으로 크롤링된 문서: %d개", len(state["document_contents"]))
+            for _ in range(max_concurrent_chunks):
+                crawl_queue.put_nowait(None)
+
+        user_query = state["user_query"]
+        chunk_document = self.chunking_service.chunk_document
+
+        async def chunk_worker() -> None:
+            while (content := await crawl_queue.get()) is not None:
+                logger.debug("🔧 문서 청킹 시작: %s", content.url)
+                try:
+                    chunks = await chunk_document(content, user_query)
+                except Exception as e:
+                    logger.error("  ❌ 문서 청킹 실패: %s - %s", content.url, e)
+                    continue
+                logger.debug("  ✅ 문서 청킹 성공: %d개 chunk 생성", len(chunks))
+                await chunk_queue.put(chunks)
+            await chunk_queue.put(None)
+
+        async def store_stage() -> None:
+            # 청크를 EMBED_BATCH_SIZE개 또는 첫 청크 도착 후 EMBED_FLUSH_INTERVAL초까지
+            # 모아 한 번에 임베딩/저장 (문서마다 임베딩 요청을 보내지 않도록)
+            loop = asyncio.get_running_loop()
+            finished_workers = 0
+            batch: List[SemanticChunk] = []
+            deadline = 0.0
+
+            async def flush() -> None:
+                nonlocal batch
+                if batch:
+                    pending, batch = batch, []
+                    state["chunks"].extend(await self._embed_and_store(pending))
+
+            while finished_workers < max_concurrent_chunks:
+                timeout = max(0.0, deadline - loop.time()) if batch else None
+                try:
+                    chunks = await asyncio.wait_for(chunk_queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    await flush()
+                    continue
+                if chunks is None:
+                    finished_workers += 1
+                    continue
+                if not batch:
+                    deadline = loop.time() + EMBED_FLUSH_INTERVAL
+                batch.extend(chunks)
+                if len(batch) >= EMBED_BATCH_SIZE:
+                    await flush()
+            await flush()
+
+        await asyncio.gather(
+            crawl_stage(),
+            *[chunk_worker() for _ in range(max_concurrent_chunks)],
+            store_stage(),
+        )
+
+        logger.info("📊 총 %d개 chunk 생성 및 저장 완료", len(state["chunks"]))
         return state
 
-    async def store_vectors(self, state: PipelineState) -> PipelineState:
-        """벡터 저장 (임베딩 생성 포함)."""
-        chunks = state["chunks"]
-        logger.info(f"🔢 생성된 chunks 개수: {len(chunks)}")
-        
+    async def _embed_and_store(self, chunks: List[SemanticChunk]) -> List[SemanticChunk]:
+        """벡터 저장 (임베딩 생성 포함) 후 실제로 저장한 청크 반환."""
         if not chunks:
-            logger.warning("⚠️  저장할 chunks가 없습니다.")
-            return state
-            
-        # 임베딩이 없는 chunks에 임베딩 생성
-        chunks_without_embedding = [chunk for chunk in chunks if not chunk.embedding]
-        if chunks_without_embedding:
-            logger.info(f"🔮 {len(chunks_without_embedding)}개 chunk에 임베딩 생성 중...")
-            texts = [chunk.content for chunk in chunks_without_embedding]
+            return chunks
+
+        # 임베딩이 없는 chunks에 임베딩 생성 (같은 내용은 캐시/한 번의 요청으로 처리)
+        misses: Dict[bytes, List[SemanticChunk]] = {}
+        for chunk in chunks:
+            if chunk.embedding:
+                continue
+            key = _content_key(chunk.content)
+            cached = self._embedding_cache.get(key)
+            if cached is not None:
+                self._embedding_cache.move_to_end(key)
+                chunk.embedding = cached
+            else:
+                misses.setdefault(key, []).append(chunk)
+
+        if misses:
+            logger.info("🔮 %d개 고유 chunk 내용에 임베딩 생성 중...", len(misses))
+            texts = [group[0].content for group in misses.values()]
             
             try:
                 embeddings = await self.llm_service.get_embeddings(texts)
-                for chunk, embedding in zip(chunks_without_embedding, embeddings):
-                    chunk.embedding = embedding
+                for (key, group), embedding in zip(misses.items(), embeddings):
+                    for chunk in group:
+                        chunk.embedding = embedding
+                    self._embedding_cache[key] = embedding
+                while len(self._embedding_cache) > EMBEDDING_CACHE_SIZE:
+                    self._embedding_cache.popitem(last=False)
                 logger.info("✅ 임베딩 생성 완료")
             except Exception as e:
-                logger.error(f"❌ 임베딩 생성 실패: {str(e)}")
-                # 임베딩 없이도 저장할 수 있도록 임시 임베딩 생성
-                for chunk in chunks_without_embedding:
-                    chunk.embedding = [0.0] * 1024  # 임시 더미 임베딩 (bge-large:335m 차원)
-                logger.warning("⚠️  더미 임베딩으로 대체했습니다.")
-        
-        if chunks:
-            logger.debug(f"📝 첫 번째 chunk ID: {chunks[0].chunk_id}")
-            logger.debug(f"📄 첫 번째 chunk 내용: {chunks[0].content[:100]}...")
-            logger.debug(f"🔮 첫 번째 chunk 임베딩 길이: {len(chunks[0].embedding) if chunks[0].embedding else 0}")
+                logger.error("❌ 임베딩 생성 실패: %s", e)
+                # 더미 벡터는 검색 결과를 왜곡하므로 임베딩이 없는 청크는 저장하지 않음
+                total = len(chunks)
+                chunks = [chunk for chunk in chunks if chunk.embedding]
+                logger.warning("⚠️  임베딩이 없는 %d개 chunk를 제외했습니다.", total - len(chunks))
+                if not chunks:
+                    return chunks
+
+        if logger.isEnabledFor(logging.DEBUG):
+            first = chunks[0]
+            logger.debug("📝 첫 번째 chunk ID: %s", first.chunk_id)
+            logger.debug("📄 첫 번째 chunk 내용: %s...", first.content[:100])
+            logger.debug("🔮 첫 번째 chunk 임베딩 길이: %d", len(first.embedding or ()))
             
         await self.vector_store.add_chunks(chunks)
-        logger.info(f"💾 Vector store에 {len(chunks)}개 chunk 저장 완료")
-        return state
+        logger.info("💾 Vector store에 %d개 chunk 저장 완료", len(chunks))
+        return chunks
 
     async def retrieve_chunks(self, state: PipelineState) -> PipelineState:
-        """관련 청크 검색 및 리랭킹."""
-        retrieved = await self.retrieval_service.retrieve(state["user_query"], k=20)
+        """관련 청크 검색 및 리랭킹.
+
+        이번 실행에서 방금 임베딩한 청크에서 충분히 유사한 청크를 찾으면 전체 저장소
+        (이전 세션 청크 포함) 하이브리드 검색을 생략한다.
+        """
+        if self._retrieval_prerequisite is not None:
+            # 타임아웃으로 파이프라인이 취소되어도 등록된 작업은 계속 진행되도록 shield
+            await asyncio.shield(self._retrieval_prerequisite)
+
+        query_embedding = state.get("query_embedding")
+        retrieved = self._search_fresh_chunks(
+            query_embedding, state.get("chunks") or [], k=RERANK_CANDIDATES
+        )
+        if retrieved is None:
+            retrieved = await self.retrieval_service.retrieve(
+                state["user_query"], k=20, query_embedding=query_embedding
+            )
+        else:
+            logger.info("⚡ 이번 실행 청크에서 %d개 검색 (전체 검색 생략)", len(retrieved))
+        # 벡터+BM25 융합 순위 상위 후보만 리랭킹 (20개 깊이로 융합한 뒤 잘라냄)
         reranked = await self.reranking_service.rerank(
-            state["user_query"], retrieved, k=5
+            state["user_query"], retrieved[:RERANK_CANDIDATES], k=5
         )
         state["scratch_pad"] = ScratchPad(
             query=state["user_query"],
@@ -224,24 +466,60 @@ class QAPipeline:
         )
         return state
 
+    def _search_fresh_chunks(
+        self,
+        query_embedding: Optional[List[float]],
+        chunks: List[SemanticChunk],
+        k: int,
+    ) -> Optional[List[SemanticChunk]]:
+        """이번 실행 청크에 대한 코사인 유사도 상위 k개 (신뢰도가 낮으면 None)."""
+        candidates = [chunk for chunk in chunks if chunk.embedding]
+        if query_embedding is None or not candidates:
+            return None
+
+        matrix = np.asarray([chunk.embedding for chunk in candidates], dtype=np.float32)
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if matrix.shape[1] != query.shape[0]:
+            return None
+        # 더미(0) 임베딩은 노름이 0이므로 분모를 1로 두어 점수 0으로 처리
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        scores = (matrix @ query) / np.where(norms > 0, norms, 1.0)
+
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.lexsort((top, -scores[top]))]
+        if scores[top[0]] < FRESH_MATCH_MIN_SCORE:
+            return None
+        return [candidates[i] for i in top]
+
     async def generate_answer(self, state: PipelineState) -> PipelineState:
         """최종 답변 생성."""
-        context = "\n\n".join(
-            [
-                f"[Source: {chunk.source_url}]\n{chunk.content}"
-                for chunk in state["scratch_pad"].chunks
-            ]
-        )
+        # 컨텍스트 구간과 출처 목록을 한 번의 순회로 생성
+        sections: List[str] = []
+        sources: List[str] = []
+        for chunk in state["scratch_pad"].chunks:
+            sources.append(chunk.source_url)
+            sections.append(f"[Source: {chunk.source_url}]\n{chunk.content}")
+        context = "\n\n".join(sections)
 
-        answer = await self.llm_service.generate_answer(
+        # 스트리밍으로 받은 토큰을 호출자 버퍼에도 기록 (타임아웃 시 부분 답변 반환용)
+        buffer = partial_answer_buffer.get()
+        parts: List[str] = []
+        async for token in self.llm_service.stream_answer(
             query=state["user_query"], context=context
-        )
+        ):
+            parts.append(token)
+            if buffer is not None:
+                buffer.append(token)
+        answer = "".join(parts)
 
         state["response"] = QAResponse(
             query=state["user_query"],
             answer=answer,
-            sources=[chunk.source_url for chunk in state["scratch_pad"].chunks],
-            processing_time=datetime.now().timestamp() - state["start_time"],
+            sources=sources,
+            processing_time=time.monotonic() - state["start_time"],
         )
         return state
 
@@ -249,8 +527,10 @@ class QAPipeline:
         """파이프라인 실행."""
         initial_state = {
             "user_query": query,
-            "start_time": datetime.now().timestamp(),
+            "start_time": time.monotonic(),
         }
 
-        final_state = await self.graph.ainvoke(initial_state)
+        final_state = await self.graph.ainvoke(
+            initial_state, config={"configurable": {"pipeline": self}}
+        )
         return final_state["response"]
@@ -3,22 +3,54 @@
 import asyncio
 import os
 import uuid
-from typing import Optional
-from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, List, Mapping, Optional, Set
+
+try:
+    import uvloop
+except ImportError:  # uvloop 미지원 환경 (Windows 등)
+    uvloop = None
 
 # Core domain (인터페이스만 사용)
-from .core.pipeline import QAPipeline
+from .core.pipeline import QAPipeline, partial_answer_buffer
 from .core.models import IPersistentStore
 
 # Concrete implementations (어댑터)
 from .adapters.llm_adapter import VLLMAdapter
 from .adapters.web_search_adapter import TavilySearchAdapter, GoogleSearchAdapter
-from .adapters.crawling_adapter import PlaywrightCrawler
+from .adapters.web_search_adapter import acquire_client as acquire_search_client
+from .adapters.web_search_adapter import release_client as release_search_client
+from .adapters.crawling_adapter import acquire_shared_crawler, release_shared_crawler
 from .adapters.vector_store_adapter import FAISSVectorStore
 from .adapters.persistent_store_adapter import QdrantPersistentStore
 from .adapters.chunking_adapter import SimpleChunkingAdapter, ContextualChunkingAdapter
 from .adapters.retrieval_adapter import HybridRetrievalAdapter
 from .adapters.reranking_adapter import CrossEncoderRerankingAdapter
+from .utils.logger import flush_logs, setup_logger
+
+logger = setup_logger(__name__)
+
+
+@lru_cache(maxsize=1)
+def _default_config() -> Mapping[str, Any]:
+    """기본 설정 (환경 변수는 처음 한 번만 읽고 읽기 전용으로 공유)."""
+    return MappingProxyType({
+        "llm_model": "Qwen/Qwen3-4B-Instruct-2507-FP8",
+        "embedding_model": "bge-large:335m",
+        "vllm_base_url": "http://localhost:8000/v1",
+        "search_provider": "tavily",  # "tavily" or "google"
+        "tavily_api_key": os.getenv("TAVILY_API_KEY", ""),
+        "google_api_key": os.getenv("GOOGLE_API_KEY", ""),
+        "google_cx": os.getenv("GOOGLE_CX", ""),
+        "vector_dimension": 1024,  # bge-large:335m은 1024차원
+        "chunk_size": 1000,
+        "chunk_overlap": 200,
+        "chunking_strategy": "contextual",  # "simple" or "contextual"
+        "max_processing_time": 10.0,
+        "qdrant_host": "localhost",
+        "qdrant_port": 6333,
+    })
 
 
 class DependencyContainer:
@@ -51,12 +83,16 @@ class DependencyContainer:
                 self._instances["search_service"] = TavilySearchAdapter(
                     api_key=self.config["tavily_api_key"]
                 )
+            # 프로세스 공유 HTTP 클라이언트는 마지막 컨테이너가 종료될 때 닫힘
+            acquire_search_client()
         return self._instances["search_service"]
 
     def get_crawling_service(self):
         """크롤링 서비스 인스턴스 반환."""
         if "crawling_service" not in self._instances:
-            self._instances["crawling_service"] = PlaywrightCrawler()
+            # 이미 실행된 브라우저를 재사용하도록 프로세스 공유 크롤러 사용
+            # (브라우저는 마지막 컨테이너가 종료될 때 닫힘)
+            self._instances["crawling_service"] = acquire_shared_crawler()
         return self._instances["crawling_service"]
 
     def get_vector_store(self):
@@ -108,6 +144,27 @@ class DependencyContainer:
             self._instances["reranking_service"] = CrossEncoderRerankingAdapter()
         return self._instances["reranking_service"]
 
+    async def startup(self) -> None:
+        """무거운 외부 리소스(Chromium 브라우저, Qdrant 연결) 사전 초기화.
+
+        서로 독립적인 초기화이므로 동시에 실행하여 가장 느린 것만큼만 기다린다.
+        """
+        await asyncio.gather(
+            self.get_crawling_service().startup(),
+            self.get_persistent_store().startup(),
+        )
+
+    async def shutdown(self) -> None:
+        """생성된 어댑터의 외부 리소스 정리."""
+        if self._instances.pop("crawling_service", None) is not None:
+            await release_shared_crawler()
+        if "llm_service" in self._instances:
+            await self._instances["llm_service"].client.aclose()
+        if "persistent_store" in self._instances:
+            await self._instances["persistent_store"].close()
+        if self._instances.pop("search_service", None) is not None:
+            await release_search_client()
+
     def build_pipeline(self) -> QAPipeline:
         """파이프라인 조립 - 모든 의존성 주입."""
         return QAPipeline(
@@ -125,45 +182,67 @@ class WebSearchQASystem:
     """웹 검색 QA 시스템 - 최상위 조립."""
 
     def __init__(self, config: Optional[dict] = None, session_id: Optional[str] = None):
-        self.config = config or self._get_default_config()
+        # 기본 설정 위에 전달받은 설정을 덮어씀 (기본 설정 객체는 공유하므로 복사)
+        self.config = {**_default_config(), **(config or {})}
         self.session_id = session_id or str(uuid.uuid4())
         self.container = DependencyContainer(self.config, self.session_id)
         self.pipeline = self.container.build_pipeline()
         self.persistent_store = self.container.get_persistent_store()
-
-    def _get_default_config(self) -> dict:
-        """기본 설정."""
-        return {
-            "llm_model": "Qwen/Qwen3-4B-Instruct-2507-FP8",
-            "embedding_model": "bge-large:335m",
-            "vllm_base_url": "http://localhost:8000/v1",
-            "search_provider": "tavily",  # "tavily" or "google"
-            "tavily_api_key": os.getenv("TAVILY_API_KEY", ""),
-            "google_api_key": os.getenv("GOOGLE_API_KEY", ""),
-            "google_cx": os.getenv("GOOGLE_CX", ""),
-            "vector_dimension": 1024,  # bge-large:335m은 1024차원
-            "chunk_size": 1000,
-            "chunk_overlap": 200,
-            "chunking_strategy": "contextual",  # "simple" or "contextual"
-            "max_processing_time": 10.0,
-            "qdrant_host": "localhost",
-            "qdrant_port": 6333,
-        }
+        # 이전 세션 청크 로드 (첫 쿼리에서 시작, 파이프라인 앞 단계와 병렬 실행)
+        self._session_load_task: Optional[asyncio.Task] = None
+        # 백그라운드 세션 저장 (다음 쿼리를 막지 않도록 기다리지 않음)
+        self._session_save_task: Optional[asyncio.Task] = None
+        # 영구 저장소에 이미 있는 청크 ID (로드한 청크 포함, 저장소 clear와 무관하게 유지)
+        self._saved_chunk_ids: Set[str] = set()
+
+    async def startup(self) -> None:
+        """앱 초기화 - 크롤러 브라우저 등 사전 실행, 이전 세션 로드 시작.
+
+        Qdrant 서버에 연결할 수 없으면 RuntimeError로 즉시 실패한다.
+        """
+        self._start_session_load()
+        try:
+            await self.container.startup()
+        except BaseException:
+            self._session_load_task.cancel()
+            raise
+
+    def _start_session_load(self) -> None:
+        """이전 세션 청크 로드를 백그라운드로 시작 (한 번만)."""
+        if self._session_load_task is None:
+            self._session_load_task = asyncio.create_task(self._load_session_data())
+            self.pipeline.set_retrieval_prerequisite(self._session_load_task)
+
+    async def shutdown(self) -> None:
+        """앱 종료 - 브라우저/HTTP 클라이언트 정리."""
+        if self._session_load_task is not None and not self._session_load_task.done():
+            self._session_load_task.cancel()
+        if self._session_save_task is not None:
+            # 진행 중인 저장은 끝까지 기다려 데이터 유실 방지
+            await self._session_save_task
+        await self.container.shutdown()
+        # 큐 기반 로거(파이프라인)에 남은 로그 출력
+        flush_logs()
 
     async def process_query(self, query: str) -> dict:
         """쿼리 처리 (10초 타임아웃)."""
+        partial_tokens: List[str] = []
+        buffer_token = partial_answer_buffer.set(partial_tokens)
         try:
-            # 이전 세션 데이터 로드
-            await self._load_session_data()
-
-            # 타임아웃 설정
-            response = await asyncio.wait_for(
-                self.pipeline.run(query), timeout=self.config["max_processing_time"]
+            # 이전 세션 데이터는 한 번만 로드하며, 검색 단계 전까지만 끝나면 되므로
+            # 기다리지 않고 웹 검색/크롤링과 겹쳐 실행
+            self._start_session_load()
+
+            # 타임아웃 설정 (스트리밍된 답변 토큰은 partial_tokens에 누적)
+            # asyncio.timeout은 wait_for와 달리 별도 Task를 만들지 않고 현재 Task를 취소
+            async with asyncio.timeout(self.config["max_processing_time"]):
+                response = await self.pipeline.run(query)
+
+            # 세션 데이터 저장 (응답을 막지 않도록 백그라운드 실행, 이전 저장 뒤에 이어서)
+            self._session_save_task = asyncio.create_task(
+                self._save_session_data(self._session_save_task)
             )
 
-            # 세션 데이터 저장
-            await self._save_session_data()
-
             return {
                 "success": True,
                 "response": response.model_dump(),
@@ -174,13 +253,14 @@ class WebSearchQASystem:
             return {
                 "success": False,
                 "error": "Processing exceeded 10 seconds timeout",
-                "partial_response": None,
+                # 답변 생성 도중 시간 초과 시 그때까지 생성된 답변 반환
+                "partial_response": "".join(partial_tokens) or None,
             }
         except Exception as e:
-            print(f"❌ 처리 중 오류 발생: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ 처리 중 오류 발생: %s", e)
             return {"success": False, "error": str(e), "partial_response": None}
+        finally:
+            partial_answer_buffer.reset(buffer_token)
 
     async def _load_session_data(self):
         """세션 데이터 로드."""
@@ -188,28 +268,37 @@ class WebSearchQASystem:
             chunks = await self.persistent_store.load_session()
             if chunks:
                 await self.container.get_vector_store().add_chunks(chunks)
-                print(f"🔄 세션 '{self.session_id}'에서 {len(chunks)}개 기존 청크를 로드했습니다.")
-        except:
-            pass  # 첫 실행 시 무시
+                # 로드한 청크는 이미 영구 저장소에 있으므로 다시 저장하지 않음
+                self._saved_chunk_ids.update(chunk.chunk_id for chunk in chunks)
+                logger.info("🔄 세션 '%s'에서 %d개 기존 청크를 로드했습니다.", self.session_id, len(chunks))
+        except Exception as e:
+            # 첫 실행(컬렉션 없음)이나 Qdrant 미실행 시 무시
+            logger.debug("세션 로드 생략: %s", e)
 
-    async def _save_session_data(self):
-        """세션 데이터 저장."""
+    async def flush_session(self) -> None:
+        """진행 중인 백그라운드 저장을 마친 뒤 남은 청크를 조회 가능해질 때까지 기다리며 저장."""
+        self._session_save_task = asyncio.create_task(
+            self._save_session_data(self._session_save_task, wait=True)
+        )
+        await self._session_save_task
+
+    async def _save_session_data(self, previous: Optional[asyncio.Task] = None, wait: bool = False):
+        """세션 데이터 저장 (이전 저장 작업이 있으면 끝난 뒤 실행)."""
+        if previous is not None:
+            await previous
         try:
-            vector_store = self.container.get_vector_store()
-            # FAISSVectorStore의 chunks 속성 접근
-            if hasattr(vector_store, "chunks"):
-                print(f"💾 Vector store에 있는 chunks 개수: {len(vector_store.chunks)}")
-                if vector_store.chunks:
-                    await self.persistent_store.save_session(vector_store.chunks)
-                    print(f"✅ 세션 '{self.session_id}'에 {len(vector_store.chunks)}개 chunk를 저장했습니다.")
-                else:
-                    print("⚠️  Vector store에 저장된 chunks가 없습니다.")
+            chunks = self.container.get_vector_store().snapshot()
+            logger.info("💾 Vector store에 있는 chunks 개수: %d", len(chunks))
+            new_chunks = [chunk for chunk in chunks if chunk.chunk_id not in self._saved_chunk_ids]
+            if new_chunks:
+                await self.persistent_store.save_session(new_chunks, wait=wait)
+                # 저장이 확인된 뒤에만 기록 (실패한 청크는 다음 저장에서 다시 시도)
+                self._saved_chunk_ids.update(chunk.chunk_id for chunk in new_chunks)
+                logger.info("✅ 세션 '%s'에 %d개 chunk를 추가 저장했습니다.", self.session_id, len(new_chunks))
             else:
-                print("❌ Vector store에 chunks 속성이 없습니다.")
+                logger.info("⚠️  새로 저장할 chunks가 없습니다.")
         except Exception as e:
-            print(f"Failed to save session: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ 세션 저장 실패: %s", e)
 
 
 async def main():
@@ -232,27 +321,33 @@ async def main():
 
     # 시스템 초기화
     system = WebSearchQASystem(config)
+    await system.startup()
     print(f"🔑 세션 ID: {system.session_id}")
 
     # 예제 쿼리 처리
     queries = ["최근 AI 기술 동향은?", "2024년 한국 경제 전망", "기후 변화 대응 방안"]
 
-    for query in queries:
-        print(f"\n처리 중: {query}")
-        print("-" * 50)
+    try:
+        for query in queries:
+            print(f"\n처리 중: {query}")
+            print("-" * 50)
 
-        start_time = datetime.now()
-        result = await system.process_query(query)
+            result = await system.process_query(query)
 
-        if result["success"]:
-            response = result["response"]
-            print(f"답변: {response['answer'][:200]}...")
-            print(f"소스: {', '.join(response['sources'][:3])}")
-            print(f"처리 시간: {result['processing_time']:.2f}초")
-        else:
-            print(f"오류: {result['error']}")
+            if result["success"]:
+                response = result["response"]
+                print(f"답변: {response['answer'][:200]}...")
+                print(f"소스: {', '.join(response['sources'][:3])}")
+                print(f"처리 시간: {result['processing_time']:.2f}초")
+            else:
+                print(f"오류: {result['error']}")
+    finally:
+        await system.shutdown()
 
 
 if __name__ == "__main__":
-    # 이벤트 루프 실행
-    asyncio.run(main())
+    # 이벤트 루프 실행 (uvloop(libuv 기반 이벤트 루프)가 있으면 사용)
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
@@ -1,13 +1,61 @@
 """로깅 설정 모듈"""
 
+import atexit
 import logging
 import os
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 
+_FORMATTER = logging.Formatter(
+    "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
 
-def setup_logger(name: str, level: Optional[str] = None) -> logging.Logger:
-    """모듈별 로거 설정"""
+_LEVELS = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+    "CRITICAL": logging.CRITICAL,
+}
+
+# 큐 기반 로거가 공유하는 큐와 stdout 출력 스레드 (처음 필요할 때 시작)
+_LOG_QUEUE: Optional[queue.Queue] = None
+_LISTENER: Optional[QueueListener] = None
+
+
+def _get_log_queue() -> queue.Queue:
+    """공유 로그 큐 반환 (최초 호출 시 stdout에 쓰는 리스너 스레드 시작)."""
+    global _LOG_QUEUE, _LISTENER
+    if _LOG_QUEUE is None:
+        _LOG_QUEUE = queue.Queue(-1)
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(_FORMATTER)
+        _LISTENER = QueueListener(_LOG_QUEUE, handler)
+        _LISTENER.start()
+        # 종료 시 큐에 남은 로그를 모두 출력
+        atexit.register(_LISTENER.stop)
+    return _LOG_QUEUE
+
+
+def flush_logs() -> None:
+    """큐에 쌓인 로그를 모두 출력 (앱 종료 시 호출, 이후 로그를 위해 리스너는 다시 시작)."""
+    if _LISTENER is not None:
+        _LISTENER.stop()
+        _LISTENER.start()
+
+
+def setup_logger(
+    name: str, level: Optional[str] = None, queue_based: bool = False
+) -> logging.Logger:
+    """모듈별 로거 설정
+
+    queue_based=True(선택)이면 로그 레코드를 큐에 넣기만 하고 실제 출력(write/flush)은
+    별도 스레드에서 수행하므로 이벤트 루프가 stdout 쓰기로 멈추지 않는다.
+    이 경우 다른 로거와 출력 순서가 섞일 수 있으므로 종료 시 flush_logs()를 호출한다.
+    """
     logger = logging.getLogger(name)
 
     # 이미 핸들러가 설정되어 있으면 중복 설정 방지
@@ -15,19 +63,16 @@ def setup_logger(name: str, level: Optional[str] = None) -> logging.Logger:
         return logger
 
     # 로그 레벨 설정 (환경변수 또는 기본값 INFO)
-    log_level = level or "INFO"
-    logger.setLevel(getattr(logging, log_level.upper()))
-
-    # 콘솔 핸들러 생성
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setLevel(getattr(logging, log_level.upper()))
-
-    # 포맷터 설정
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-    handler.setFormatter(formatter)
+    log_level = _LEVELS.get((level or "INFO").upper(), logging.INFO)
+    logger.setLevel(log_level)
+
+    # 콘솔 핸들러 생성 (큐 기반이면 리스너 스레드가 출력)
+    if queue_based:
+        handler = QueueHandler(_get_log_queue())
+    else:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(_FORMATTER)
+    handler.setLevel(log_level)
 
     logger.addHandler(handler)
     logger.propagate = False  # 상위 로거로의 전파 방지
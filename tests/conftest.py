@@ -0,0 +1,82 @@
+import os
+from functools import lru_cache
+from types import MappingProxyType
+from unittest.mock import AsyncMock
+
+import pytest
+from src.core.models import (
+    ILLMService,
+    IWebSearchService,
+    ICrawlingService,
+    IVectorStore,
+    IChunkingService,
+    IRetrievalService,
+    IRerankingService,
+)
+
+
+# 테스트 공통 설정 (읽기 전용, 테스트에서는 base_config 픽스처로 받아 {**base_config, ...}로 변형)
+BASE_CONFIG = MappingProxyType({
+    "llm_model": "test-model",
+    "search_provider": "tavily",
+    "tavily_api_key": "test-key",
+    "google_api_key": "test-key",
+    "google_cx": "test-cx",
+    "vector_dimension": 768,
+    "chunk_size": 100,
+    "chunk_overlap": 20,
+    "chunking_strategy": "simple",
+    "max_processing_time": 5.0,
+})
+
+# pytest-xdist 워커 ID (병렬 실행이 아니면 "master") - 워커 간 Qdrant 컬렉션 분리용
+_WORKER_ID = os.getenv("PYTEST_XDIST_WORKER", "master")
+
+
+@lru_cache(maxsize=None)
+def _cached_system(config_items: tuple):
+    """같은 설정의 시스템은 한 번만 생성 (설정 항목 튜플이 캐시 키)."""
+    # src.main은 모든 어댑터를 불러오므로 필요한 테스트에서만 import
+    from src.main import WebSearchQASystem
+
+    return WebSearchQASystem(dict(config_items))
+
+
+@pytest.fixture(scope="session")
+def base_config():
+    """테스트 공통 설정."""
+    return BASE_CONFIG
+
+
+@pytest.fixture(scope="session")
+def session_id():
+    """워커별 세션 ID (Qdrant 컬렉션 이름이 xdist 워커 간에 겹치지 않도록)."""
+    return f"test-session-{_WORKER_ID}"
+
+
+@pytest.fixture(scope="module")
+def container(base_config, session_id):
+    """모듈 내 테스트가 공유하는 의존성 컨테이너 (어댑터 생성은 한 번만)."""
+    from src.main import DependencyContainer
+
+    return DependencyContainer(base_config, session_id=session_id)
+
+
+@pytest.fixture(scope="session")
+def make_system():
+    """설정이 같으면 같은 WebSearchQASystem을 반환하는 팩토리."""
+    return lambda config: _cached_system(tuple(sorted(config.items())))
+
+
+@pytest.fixture(scope="session")
+def mocked_interfaces():
+    """포트 인터페이스별 AsyncMock (spec 분석 비용은 세션당 한 번, 사용하는 쪽에서 초기화)."""
+    return {
+        "llm": AsyncMock(spec=ILLMService),
+        "search": AsyncMock(spec=IWebSearchService),
+        "crawling": AsyncMock(spec=ICrawlingService),
+        "vector_store": AsyncMock(spec=IVectorStore),
+        "chunking": AsyncMock(spec=IChunkingService),
+        "retrieval": AsyncMock(spec=IRetrievalService),
+        "reranking": AsyncMock(spec=IRerankingService),
+    }
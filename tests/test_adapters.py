@@ -9,7 +9,6 @@ from src.adapters.vector_store_adapter import FAISSVectorStore
 class TestAdapters:
     """어댑터 구현체 테스트."""
 
-    @pytest.mark.asyncio
     async def test_llm_adapter_implements_interface(self):
         """LLM 어댑터가 ILLMService 인터페이스를 구현하는지 테스트."""
         from src.core.models import ILLMService
@@ -24,7 +23,6 @@ class TestAdapters:
         answer = await adapter.generate_answer("test", "context")
         assert isinstance(answer, str)
 
-    @pytest.mark.asyncio
     async def test_vector_store_implements_interface(self):
         """벡터 저장소가 IVectorStore 인터페이스를 구현하는지 테스트."""
         from src.core.models import IVectorStore
@@ -46,12 +44,13 @@ class TestAdapters:
         await store.add_chunks(chunks)
         results = await store.search([0.2] * 768, k=3)
         assert len(results) <= 3
+        assert [c.chunk_id for c in store.snapshot()] == [c.chunk_id for c in chunks]
 
         await store.clear()
         results_after_clear = await store.search([0.2] * 768, k=3)
         assert len(results_after_clear) == 0
+        assert store.snapshot() == []
 
-    @pytest.mark.asyncio
     @patch("httpx.AsyncClient.post")
     async def test_search_adapter_implements_interface(self, mock_post):
         """검색 어댑터가 IWebSearchService 인터페이스를 구현하는지 테스트."""
@@ -74,3 +73,345 @@ class TestAdapters:
 
         results = await adapter.search("test query", max_results=1)
         assert len(results) == 1
+
+    async def test_contextual_chunking_uses_batch_generation(self):
+        """Contextual 청킹이 단일 배치 호출로 컨텍스트를 생성하는지 테스트."""
+        from src.core.models import ILLMService, WebDocumentContent
+        from src.adapters.chunking_adapter import ContextualChunkingAdapter
+
+        llm = AsyncMock(spec=ILLMService)
+        llm.generate_batch.side_effect = lambda prompts, **kwargs: [
+            f"context {i}" for i in range(len(prompts))
+        ]
+
+        adapter = ContextualChunkingAdapter(llm_service=llm, chunk_size=100, overlap=20)
+        document = WebDocumentContent(url="https://example.com", content="가나다라 " * 60)
+
+        chunks = await adapter.chunk_document(document, "test query")
+
+        assert len(chunks) > 1
+        llm.generate_batch.assert_called_once()
+        llm.generate_answer.assert_not_called()
+        assert chunks[0].content.startswith("context 0")
+
+    async def test_llm_adapter_parses_numbered_queries(self):
+        """번호 매김 응답에서 검색 쿼리를 추출하는지 테스트."""
+        adapter = VLLMAdapter()
+        adapter._call_vllm = AsyncMock(
+            return_value="검색 쿼리:\n1. 첫 번째 쿼리\n  2.두 번째 쿼리\n\n3. 세 번째 쿼리\n4. 네 번째"
+        )
+
+        queries = await adapter.generate_queries("원본 질문")
+
+        assert queries[0].processed_queries == ["첫 번째 쿼리", "두 번째 쿼리", "세 번째 쿼리"]
+
+    async def test_contextual_chunking_deduplicates_prompts(self):
+        """동일한 청크 텍스트의 프롬프트는 한 번만 요청하는지 테스트."""
+        from src.core.models import ILLMService, WebDocumentContent
+        from src.adapters.chunking_adapter import ContextualChunkingAdapter
+
+        llm = AsyncMock(spec=ILLMService)
+        llm.generate_batch.side_effect = lambda prompts, **kwargs: ["ctx"] * len(prompts)
+
+        adapter = ContextualChunkingAdapter(llm_service=llm, chunk_size=100, overlap=0)
+        document = WebDocumentContent(url="https://example.com", content="a" * 300)
+
+        chunks = await adapter.chunk_document(document, "test query")
+
+        assert len(chunks) == 3
+        assert len(llm.generate_batch.call_args.args[0]) == 1
+        assert len({chunk.chunk_id for chunk in chunks}) == 3
+
+    def test_persistent_store_payload_roundtrip(self):
+        """payload에서 embedding을 제외하고, 복원 시 vector로 다시 채우는지 테스트."""
+        from src.adapters.persistent_store_adapter import _payload, _chunk_from_point
+
+        chunk = SemanticChunk(
+            chunk_id="c1",
+            content="내용",
+            source_url="https://example.com",
+            embedding=[0.1, 0.2],
+            metadata={"position": 0},
+        )
+
+        payload = _payload(chunk)
+
+        assert "embedding" not in payload
+        assert isinstance(payload["created_at"], str)
+        assert _chunk_from_point(payload, [0.1, 0.2]) == chunk
+
+    async def test_shared_crawler_is_reusable_after_shutdown(self):
+        """공유 크롤러가 같은 인스턴스를 반환하고 종료 후 상태가 초기화되는지 테스트."""
+        from src.adapters.crawling_adapter import get_shared_crawler
+
+        crawler = get_shared_crawler()
+        assert get_shared_crawler() is crawler
+
+        crawler._cache["https://example.com"] = (0.0, Mock())
+        await crawler.shutdown()
+        assert crawler._cache == {}
+        assert crawler._browser is None
+
+    async def test_crawl_cancelling_one_caller_keeps_other_waiters(self):
+        """같은 URL을 기다리는 호출자 중 하나가 취소되어도 다른 호출자는 결과를 받는지 테스트."""
+        import asyncio
+        from src.adapters.crawling_adapter import PlaywrightCrawler
+        from src.core.models import WebDocumentContent
+
+        crawler = PlaywrightCrawler()
+        release = asyncio.Event()
+
+        async def crawl_one(url):
+            await release.wait()
+            return WebDocumentContent(url=url, content="content")
+
+        with patch.object(crawler, "_crawl_one", crawl_one):
+            a = asyncio.create_task(crawler.crawl("https://example.com"))
+            b = asyncio.create_task(crawler.crawl("https://example.com"))
+            await asyncio.sleep(0)
+            a.cancel()
+            release.set()
+
+            assert (await b).content == "content"
+            assert a.cancelled()
+
+    async def test_crawl_cache_evicts_expired_entries(self):
+        """TTL이 지난 캐시 항목이 다음 조회 시 제거되는지 테스트."""
+        from src.adapters.crawling_adapter import PlaywrightCrawler
+        from src.core.models import WebDocumentContent
+
+        crawler = PlaywrightCrawler(cache_ttl=0.0)
+
+        async def crawl_one(url):
+            return WebDocumentContent(url=url, content="content")
+
+        with patch.object(crawler, "_crawl_one", crawl_one):
+            await crawler.crawl("https://example.com/a")
+            await crawler.crawl("https://example.com/b")
+
+        assert list(crawler._cache) == ["https://example.com/b"]
+
+    def test_crawler_keeps_body_after_large_head_script(self):
+        """<head>의 큰 인라인 스크립트가 잘라내기 한도를 넘어도 본문이 남는지 테스트."""
+        from src.adapters.crawling_adapter import MAX_HTML_CHARS, PlaywrightCrawler
+
+        html = (
+            "<html><head><script>"
+            + "x" * (MAX_HTML_CHARS + 1000)
+            + "</script></head><body><p>본문 내용</p></body></html>"
+        )
+
+        assert "본문 내용" in PlaywrightCrawler()._to_markdown(html)
+
+    async def test_shared_crawler_shuts_down_after_last_owner(self):
+        """공유 크롤러는 마지막 소유자가 반환할 때만 종료되는지 테스트."""
+        from src.adapters import crawling_adapter
+
+        crawler = crawling_adapter.get_shared_crawler()
+        # 다른 테스트 모듈의 시스템이 잡고 있는 참조와 분리
+        with patch.object(crawling_adapter, "_SHARED_CRAWLER_REFS", 0), patch.object(
+            crawler, "shutdown", AsyncMock()
+        ) as shutdown:
+            assert crawling_adapter.acquire_shared_crawler() is crawler
+            crawling_adapter.acquire_shared_crawler()
+
+            await crawling_adapter.release_shared_crawler()
+            shutdown.assert_not_called()
+            await crawling_adapter.release_shared_crawler()
+            shutdown.assert_awaited_once()
+
+    async def test_vector_store_uses_cosine_similarity(self):
+        """벡터 크기와 무관하게 방향이 같은 청크를 가장 유사하게 반환하는지 테스트."""
+        store = FAISSVectorStore(dimension=2)
+        await store.add_chunks(
+            [
+                SemanticChunk(chunk_id="same", content="a", source_url="u", embedding=[0.1, 0.0]),
+                SemanticChunk(chunk_id="other", content="b", source_url="u", embedding=[3.0, 3.0]),
+            ]
+        )
+
+        results = await store.search([5.0, 0.0], k=2)
+
+        assert results[0]["chunk"].chunk_id == "same"
+        assert results[0]["score"] == pytest.approx(1.0)
+
+    async def test_vector_store_upgrades_to_hnsw_off_loop(self):
+        """임계값을 넘으면 스레드에서 HNSW로 재구성하고 검색 결과는 유지되는지 테스트."""
+        import asyncio
+        import faiss
+        from src.adapters import vector_store_adapter
+
+        store = FAISSVectorStore(dimension=2)
+        chunks = [
+            SemanticChunk(chunk_id=f"c{i}", content="c", source_url="u", embedding=[1.0, i / 10])
+            for i in range(4)
+        ]
+
+        with patch.object(vector_store_adapter, "HNSW_MIN_VECTORS", 4), patch.object(
+            asyncio, "to_thread", wraps=asyncio.to_thread
+        ) as to_thread:
+            await store.add_chunks(chunks)
+
+        to_thread.assert_called_once()
+        assert isinstance(store.index, faiss.IndexHNSW)
+        assert (await store.search([1.0, 0.0], k=1))[0]["chunk"].chunk_id == "c0"
+
+    async def test_vector_store_upgrades_to_ivfpq_with_sq8_refine(self):
+        """IVFPQ 전환 시 재채점 벡터를 float32 대신 SQ8로 보관하는지 테스트."""
+        import faiss
+        import numpy as np
+        from src.adapters import vector_store_adapter
+
+        rng = np.random.default_rng(0)
+        store = FAISSVectorStore(dimension=16)
+        chunks = [
+            SemanticChunk(chunk_id=f"c{i}", content="c", source_url="u", embedding=vector.tolist())
+            for i, vector in enumerate(rng.random((400, 16), dtype=np.float32))
+        ]
+
+        with patch.multiple(
+            vector_store_adapter,
+            HNSW_MIN_VECTORS=100,
+            IVFPQ_MIN_VECTORS=300,
+            IVFPQ_NLIST=4,
+            PQ_M=8,
+            PQ_NBITS=4,
+        ):
+            await store.add_chunks(chunks[:200])
+            assert isinstance(store.index, faiss.IndexHNSW)
+            await store.add_chunks(chunks[200:])
+
+        assert isinstance(store.index, faiss.IndexRefine)
+        assert isinstance(faiss.downcast_index(store.index.refine_index), faiss.IndexScalarQuantizer)
+        assert store.index.ntotal == 400
+        assert (await store.search(chunks[7].embedding, k=1))[0]["chunk"].chunk_id == "c7"
+
+    async def test_bm25_search_indexes_new_chunks_incrementally(self):
+        """BM25 역색인이 벡터 저장소에 추가된 청크를 반영하는지 테스트."""
+        from src.adapters.retrieval_adapter import HybridRetrievalAdapter
+
+        store = FAISSVectorStore(dimension=2)
+        await store.add_chunks(
+            [
+                SemanticChunk(chunk_id=f"c{i}", content=f"일반 문서 {i}", source_url="u", embedding=[1.0, 0.0])
+                for i in range(3)
+            ]
+        )
+        retrieval = HybridRetrievalAdapter(vector_store=store)
+        assert await retrieval._bm25_search("qdrant", k=3) == []
+
+        await store.add_chunks(
+            [SemanticChunk(chunk_id="new", content="qdrant 저장소", source_url="u", embedding=[0.0, 1.0])]
+        )
+        results = await retrieval._bm25_search("qdrant", k=3)
+
+        assert [r["chunk"].chunk_id for r in results] == ["new"]
+
+    async def test_persistent_store_loads_all_scroll_pages(self):
+        """load_session이 next_page_offset을 따라 모든 페이지를 읽는지 테스트."""
+        from src.adapters.persistent_store_adapter import QdrantPersistentStore, _payload
+
+        chunks = [
+            SemanticChunk(chunk_id=f"c{i}", content="내용", source_url="u") for i in range(5)
+        ]
+        points = [Mock(payload=_payload(chunk), vector=[0.1]) for chunk in chunks]
+
+        store = QdrantPersistentStore(session_id="test")
+        store._collection_ready = True
+        store.client = Mock()
+        store.client.scroll = AsyncMock(
+            side_effect=[(points[:2], "p2"), (points[2:4], "p3"), (points[4:], None)]
+        )
+
+        loaded = await store.load_session()
+
+        assert [chunk.chunk_id for chunk in loaded] == [f"c{i}" for i in range(5)]
+        assert store.client.scroll.call_args.kwargs["offset"] == "p3"
+
+    async def test_persistent_store_initializes_collection_once_when_concurrent(self):
+        """세션 로드와 startup이 동시에 초기화해도 컬렉션을 한 번만 생성하는지 테스트."""
+        import asyncio
+        from src.adapters.persistent_store_adapter import QdrantPersistentStore
+
+        async def collection_exists(name):
+            await asyncio.sleep(0)
+            return False
+
+        store = QdrantPersistentStore(session_id="test")
+        store.client = Mock()
+        store.client.collection_exists = AsyncMock(side_effect=collection_exists)
+        store.client.create_collection = AsyncMock()
+
+        await asyncio.gather(store.startup(), store._init_collection())
+
+        store.client.create_collection.assert_awaited_once()
+
+    async def test_persistent_store_startup_fails_fast_when_unreachable(self):
+        """Qdrant 서버에 연결할 수 없으면 startup이 RuntimeError를 전달하는지 테스트."""
+        from src.adapters.persistent_store_adapter import QdrantPersistentStore
+
+        store = QdrantPersistentStore(session_id="test")
+        store.client = Mock()
+        store.client.collection_exists = AsyncMock(side_effect=ConnectionError("refused"))
+
+        with pytest.raises(RuntimeError):
+            await store.startup()
+
+    async def test_persistent_store_client_closes_after_last_owner(self):
+        """공유 Qdrant 클라이언트는 마지막 저장소가 반환할 때만 닫히는지 테스트."""
+        from src.adapters import persistent_store_adapter
+        from src.adapters.persistent_store_adapter import QdrantPersistentStore
+
+        with patch.object(persistent_store_adapter, "AsyncQdrantClient", lambda **kwargs: AsyncMock()):
+            first = QdrantPersistentStore(session_id="a", port=16333)
+            second = QdrantPersistentStore(session_id="b", port=16333)
+            client = first.client
+            assert second.client is client
+
+            await first.close()
+            client.close.assert_not_called()
+            assert second.client is client
+
+            await second.close()
+            client.close.assert_awaited_once()
+            # 반환 후 다시 사용하면 새 클라이언트를 받음
+            assert second.client is not client
+            await second.close()
+
+    async def test_retrieval_caches_query_embeddings(self):
+        """같은 쿼리의 임베딩은 한 번만 요청하는지 테스트."""
+        from src.core.models import ILLMService
+        from src.adapters.retrieval_adapter import HybridRetrievalAdapter
+
+        llm = AsyncMock(spec=ILLMService)
+        llm.get_embeddings.return_value = [[1.0, 0.0]]
+        retrieval = HybridRetrievalAdapter(
+            vector_store=FAISSVectorStore(dimension=2), llm_service=llm, embedding_cache_size=1
+        )
+
+        await retrieval.retrieve("질문", k=3)
+        await retrieval.retrieve("질문", k=3)
+        assert llm.get_embeddings.call_count == 1
+
+        await retrieval.retrieve("다른 질문", k=3)
+        await retrieval.retrieve("질문", k=3)
+        assert llm.get_embeddings.call_count == 3
+
+    async def test_llm_adapter_streams_answer_tokens(self):
+        """SSE 스트리밍 응답의 delta 토큰을 순서대로 반환하는지 테스트."""
+        import httpx
+
+        body = (
+            b'data: {"choices":[{"delta":{"role":"assistant"}}]}\n\n'
+            b'data: {"choices":[{"delta":{"content":"Hello"}}]}\n\n'
+            b'data: {"choices":[{"delta":{"content":" world"}}]}\n\n'
+            b"data: [DONE]\n\n"
+        )
+        adapter = VLLMAdapter()
+        adapter.client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body))
+        )
+
+        tokens = [token async for token in adapter.stream_answer("질문", "컨텍스트")]
+
+        assert tokens == ["Hello", " world"]
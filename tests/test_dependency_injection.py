@@ -1,75 +1,60 @@
 import pytest
-from src.main import DependencyContainer, WebSearchQASystem
 
 
 class TestDependencyInjection:
     """의존성 주입 테스트."""
 
-    def test_container_creates_instances(self):
+    def test_container_creates_instances(self, container):
         """컨테이너가 인스턴스를 올바르게 생성하는지 테스트."""
-        config = {
-            "llm_model": "test-model",
-            "search_provider": "tavily",
-            "tavily_api_key": "test-key",
-            "vector_dimension": 768,
-            "chunk_size": 100,
-            "chunk_overlap": 20,
-            "chunking_strategy": "simple",
-            "qdrant_path": ":memory:",
-        }
-
-        container = DependencyContainer(config)
-
-        # 서비스 인스턴스 생성 확인
+        # 싱글턴 패턴 확인 (같은 인스턴스면 생성도 된 것)
         llm_service = container.get_llm_service()
-        assert llm_service is not None
+        assert llm_service is container.get_llm_service() is not None
 
         search_service = container.get_search_service()
-        assert search_service is not None
+        assert search_service is container.get_search_service() is not None
 
-        # 싱글턴 패턴 확인
-        llm_service2 = container.get_llm_service()
-        assert llm_service is llm_service2
-
-    def test_container_builds_pipeline(self):
+    def test_container_builds_pipeline(self, container):
         """컨테이너가 파이프라인을 올바르게 조립하는지 테스트."""
-        config = {
-            "llm_model": "test-model",
-            "search_provider": "tavily",
-            "tavily_api_key": "test-key",
-            "vector_dimension": 768,
-            "chunk_size": 100,
-            "chunk_overlap": 20,
-            "chunking_strategy": "simple",
-            "qdrant_path": ":memory:",
-        }
-
-        container = DependencyContainer(config)
         pipeline = container.build_pipeline()
 
         assert pipeline is not None
         assert hasattr(pipeline, "run")
 
-    def test_different_implementations_based_on_config(self):
+    @pytest.mark.parametrize(
+        "provider,extra,expected",
+        [
+            ("tavily", {"tavily_api_key": "test-key"}, "TavilySearchAdapter"),
+            ("google", {"google_api_key": "test-key", "google_cx": "test-cx"}, "GoogleSearchAdapter"),
+        ],
+    )
+    def test_different_implementations_based_on_config(
+        self, base_config, session_id, provider, extra, expected
+    ):
         """설정에 따라 다른 구현체가 선택되는지 테스트."""
-        # Tavily 설정
-        config_tavily = {
-            "search_provider": "tavily",
-            "tavily_api_key": "test-key",
-        }
-        container_tavily = DependencyContainer(config_tavily)
-        search_tavily = container_tavily.get_search_service()
+        from src.adapters import web_search_adapter
+        from src.main import DependencyContainer
+
+        config = {**base_config, "search_provider": provider, **extra}
+        container = DependencyContainer(config, session_id=session_id)
+
+        assert isinstance(container.get_search_service(), getattr(web_search_adapter, expected))
+
+    async def test_shutdown_keeps_shared_search_client_for_other_containers(self, base_config, session_id):
+        """한 컨테이너 종료가 다른 컨테이너의 공유 검색 클라이언트를 닫지 않는지 테스트."""
+        from src.adapters import web_search_adapter
+        from src.main import DependencyContainer
 
-        from src.adapters.web_search_adapter import TavilySearchAdapter
+        # 모듈 공유 container 픽스처 등 이미 등록된 소유자 수
+        baseline = web_search_adapter._CLIENT_REFS
+        first = DependencyContainer(base_config, session_id=session_id)
+        second = DependencyContainer(base_config, session_id=session_id)
+        first.get_search_service()
+        second.get_search_service()
+        client = web_search_adapter._get_client()
 
-        assert isinstance(search_tavily, TavilySearchAdapter)
+        await first.shutdown()
+        assert not client.is_closed
 
-        # Google 설정 (구현 필요)
-        config_google = {
-            "search_provider": "google",
-            "google_api_key": "test-key",
-            "google_cx": "test-cx",
-        }
-        container_google = DependencyContainer(config_google)
-        # search_google = container_google.get_search_service()
-        # assert isinstance(search_google, GoogleSearchAdapter)
+        await second.shutdown()
+        assert web_search_adapter._CLIENT_REFS == baseline
+        assert client.is_closed == (baseline == 0)
@@ -1,45 +1,38 @@
 import pytest
 import asyncio
-from unittest.mock import AsyncMock, patch
-from src.main import WebSearchQASystem
+from unittest.mock import AsyncMock
+
+
+# 공통 설정(base_config) 위에 덮어쓸 설정 조합 (수집 시점에 한 번만 생성)
+CONFIG_OVERRIDES = [
+    {"search_provider": "tavily", "chunking_strategy": "simple"},
+    {"search_provider": "google", "chunking_strategy": "contextual"},
+]
 
 
 class TestIntegration:
     """통합 테스트."""
 
-    @pytest.fixture
-    def test_system(self):
-        """테스트용 시스템 생성."""
-        config = {
-            "llm_model": "test-model",
-            "search_provider": "tavily",
-            "tavily_api_key": "test-key",
-            "vector_dimension": 768,
-            "chunk_size": 100,
-            "chunk_overlap": 20,
-            "chunking_strategy": "simple",
-            "max_processing_time": 5.0,
-            "qdrant_path": ":memory:",
-        }
-        return WebSearchQASystem(config)
-
-    @pytest.mark.asyncio
+    @pytest.fixture(scope="module")
+    def test_system(self, make_system, base_config):
+        """테스트용 시스템 생성 (모듈 내 테스트가 공유, 변경은 MonkeyPatch로 되돌림)."""
+        return make_system(base_config)
+
     async def test_timeout_handling(self, test_system):
         """타임아웃 처리 테스트."""
 
         # Mock으로 느린 처리 시뮬레이션
         async def slow_process(query):
-            await asyncio.sleep(10)
-            return None
+            # 타이머 없이 취소될 때까지 대기
+            await asyncio.Event().wait()
 
-        test_system.pipeline.run = slow_process
-
-        result = await test_system.process_query("test query")
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(test_system.pipeline, "run", slow_process)
+            result = await test_system.process_query("test query")
 
         assert result["success"] is False
         assert "timeout" in result["error"].lower()
 
-    @pytest.mark.asyncio
     async def test_error_handling(self, test_system):
         """에러 처리 테스트."""
 
@@ -47,45 +40,120 @@ class TestIntegration:
         async def error_process(query):
             raise ValueError("Test error")
 
-        test_system.pipeline.run = error_process
-
-        result = await test_system.process_query("test query")
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(test_system.pipeline, "run", error_process)
+            result = await test_system.process_query("test query")
 
         assert result["success"] is False
         assert "Test error" in result["error"]
 
-    @pytest.mark.asyncio
-    async def test_system_with_different_configs(self):
-        """다양한 설정으로 시스템 테스트."""
-        configs = [
-            {
-                "search_provider": "tavily",
-                "chunking_strategy": "simple",
-            },
-            {
-                "search_provider": "google",
-                "chunking_strategy": "contextual",
-            },
-        ]
-
-        for config in configs:
-            config.update(
-                {
-                    "llm_model": "test-model",
-                    "tavily_api_key": "test-key",
-                    "google_api_key": "test-key",
-                    "google_cx": "test-cx",
-                    "vector_dimension": 768,
-                    "chunk_size": 100,
-                    "chunk_overlap": 20,
-                    "max_processing_time": 5.0,
-                    "qdrant_path": ":memory:",
-                }
+    async def test_save_session_only_saves_new_chunks(self, test_system):
+        """세션 저장 시 이전에 저장한 청크는 다시 저장하지 않는지 테스트."""
+        from src.core.models import SemanticChunk
+
+        store = test_system.container.get_vector_store()
+        save_session = AsyncMock()
+
+        def chunk(i):
+            return SemanticChunk(chunk_id=str(i), content="c", source_url="u", embedding=[0.1] * 768)
+
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(test_system.persistent_store, "save_session", save_session)
+            await store.add_chunks([chunk(0), chunk(1)])
+            await test_system._save_session_data()
+            await store.add_chunks([chunk(2)])
+            await test_system._save_session_data()
+        # 공유 시스템의 저장소를 다음 테스트를 위해 비움
+        await store.clear()
+
+        saved = [[c.chunk_id for c in call.args[0]] for call in save_session.call_args_list]
+        assert saved == [["0", "1"], ["2"]]
+
+    async def test_save_session_skips_loaded_chunks_and_survives_clear(self, make_system, base_config):
+        """로드한 청크는 다시 저장하지 않고, clear 후 다시 채운 청크는 빠짐없이 저장하는지 테스트."""
+        from src.core.models import SemanticChunk
+
+        system = make_system({**base_config, "llm_model": "save-test-model"})
+        store = system.container.get_vector_store()
+        save_session = AsyncMock()
+
+        def chunk(i):
+            return SemanticChunk(chunk_id=f"s{i}", content="c", source_url="u", embedding=[0.1] * 768)
+
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(system.persistent_store, "load_session", AsyncMock(return_value=[chunk(0), chunk(1)]))
+            mp.setattr(system.persistent_store, "save_session", save_session)
+            await system._load_session_data()
+            await system._save_session_data()
+            save_session.assert_not_called()
+
+            await store.clear()
+            await store.add_chunks([chunk(i) for i in range(2, 5)])
+            await system._save_session_data()
+        await store.clear()
+
+        saved = [[c.chunk_id for c in call.args[0]] for call in save_session.call_args_list]
+        assert saved == [["s2", "s3", "s4"]]
+
+    async def test_flush_session_waits_for_pending_save(self, make_system, base_config):
+        """flush_session이 진행 중인 저장 뒤에 wait=True로 남은 청크를 저장하는지 테스트."""
+        import asyncio
+        from src.core.models import SemanticChunk
+
+        system = make_system({**base_config, "llm_model": "flush-test-model"})
+        store = system.container.get_vector_store()
+        calls = []
+
+        async def save_session(chunks, wait=False):
+            await asyncio.sleep(0)
+            calls.append(([c.chunk_id for c in chunks], wait))
+
+        def chunk(i):
+            return SemanticChunk(chunk_id=f"f{i}", content="c", source_url="u", embedding=[0.1] * 768)
+
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(system.persistent_store, "save_session", save_session)
+            await store.add_chunks([chunk(0)])
+            system._session_save_task = asyncio.create_task(system._save_session_data())
+            await store.add_chunks([chunk(1)])
+            await system.flush_session()
+        await store.clear()
+
+        assert calls == [(["f0"], False), (["f1"], True)]
+
+    async def test_failed_save_is_retried_on_next_flush(self, make_system, base_config):
+        """upsert 실패 시 청크를 저장된 것으로 기록하지 않고 다음 flush에서 다시 저장하는지 테스트."""
+        from unittest.mock import Mock
+        from src.core.models import SemanticChunk
+
+        system = make_system({**base_config, "llm_model": "retry-test-model"})
+        store = system.container.get_vector_store()
+        client = Mock()
+        client.upsert = AsyncMock(side_effect=[RuntimeError("qdrant down"), None])
+
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setattr(system.persistent_store, "_client", client)
+            mp.setattr(system.persistent_store, "_collection_ready", True)
+            await store.add_chunks(
+                [SemanticChunk(chunk_id="r0", content="c", source_url="u", embedding=[0.1] * 768)]
             )
+            await system.flush_session()
+            assert "r0" not in system._saved_chunk_ids
+
+            await system.flush_session()
+        await store.clear()
 
-            system = WebSearchQASystem(config)
-            assert system is not None
-            assert system.pipeline is not None
+        assert client.upsert.await_count == 2
+        retried = client.upsert.await_args_list[1].kwargs["points"]
+        assert len(retried.ids) == 1
+        assert "r0" in system._saved_chunk_ids
+
+    @pytest.mark.parametrize("overrides", CONFIG_OVERRIDES, ids=lambda c: c["search_provider"])
+    def test_system_with_different_configs(self, make_system, base_config, overrides):
+        """다양한 설정으로 시스템 테스트."""
+        system = make_system({**base_config, **overrides})
+        assert system is not None
+        assert system.pipeline is not None
 
 
 if __name__ == "__main__":
@@ -1,46 +1,38 @@
 import pytest
 from datetime import datetime
-from src.core.models import (
-    SearchQuery,
-    WebDocument,
-    WebDocumentContent,
-    SemanticChunk,
-    ScratchPad,
-    QAResponse,
-)
+from src.core.models import SearchQuery, WebDocument, SemanticChunk
 
 
 class TestModels:
     """도메인 모델 테스트."""
 
-    def test_search_query_creation(self):
-        """SearchQuery 모델 생성 테스트."""
-        query = SearchQuery(
-            original_query="test query",
-            processed_queries=["test", "query"],
-            language="ko",
-        )
-        assert query.original_query == "test query"
-        assert len(query.processed_queries) == 2
-        assert query.language == "ko"
-        assert isinstance(query.timestamp, datetime)
-
-    def test_web_document_creation(self):
-        """WebDocument 모델 생성 테스트."""
-        doc = WebDocument(
-            url="https://example.com",
-            title="Test Title",
-            snippet="Test snippet",
-            search_query="test",
-        )
-        assert doc.url == "https://example.com"
-        assert doc.title == "Test Title"
+    @pytest.mark.parametrize(
+        "cls,kwargs,expected",
+        [
+            (
+                SearchQuery,
+                {"original_query": "test query", "processed_queries": ["test", "query"], "language": "ko"},
+                {"original_query": "test query", "processed_queries": ["test", "query"], "language": "ko"},
+            ),
+            (
+                WebDocument,
+                {"url": "https://example.com", "title": "Test Title", "snippet": "Test snippet", "search_query": "test"},
+                {"url": "https://example.com", "title": "Test Title"},
+            ),
+            (
+                SemanticChunk,
+                {"chunk_id": "test_id", "content": "Test content", "source_url": "https://example.com"},
+                {"chunk_id": "test_id", "content": "Test content", "embedding": None},
+            ),
+        ],
+        ids=["search_query", "web_document", "semantic_chunk"],
+    )
+    def test_model_creation(self, cls, kwargs, expected):
+        """모델 생성 시 필드 값과 기본값이 올바른지 테스트."""
+        model = cls(**kwargs)
+        assert {attr: getattr(model, attr) for attr in expected} == expected
 
-    def test_semantic_chunk_creation(self):
-        """SemanticChunk 모델 생성 테스트."""
-        chunk = SemanticChunk(
-            chunk_id="test_id", content="Test content", source_url="https://example.com"
-        )
-        assert chunk.chunk_id == "test_id"
-        assert chunk.content == "Test content"
-        assert chunk.embedding is None
+    def test_search_query_default_timestamp(self):
+        """SearchQuery 생성 시각이 기본값으로 채워지는지 테스트."""
+        query = SearchQuery(original_query="test query", processed_queries=["test"])
+        assert isinstance(query.timestamp, datetime)
@@ -1,39 +1,34 @@
 import pytest
-from unittest.mock import AsyncMock, Mock
-from src.core.pipeline import QAPipeline, PipelineState
+from types import MappingProxyType
+from src.core.pipeline import QAPipeline
 from src.core.models import (
     SearchQuery,
     WebDocument,
-    QAResponse,
-    ILLMService,
-    IWebSearchService,
-    ICrawlingService,
-    IVectorStore,
-    IChunkingService,
-    IRetrievalService,
-    IRerankingService,
 )
 
 
+# 여러 테스트에서 읽기 전용으로 재사용하는 모델 (검증은 모듈 로드 시 한 번만)
+_FIXED_QUERY = SearchQuery(original_query="test query", processed_queries=["test", "query"])
+# URL이 이미 정규화된 형태이므로 search_web의 URL 정규화로 바뀌지 않음
+_FIXED_DOCUMENT = WebDocument(url="https://example.com", title="Test", search_query="test")
+# 단계별 입력 상태 (읽기 전용)
+_USER_QUERY_STATE = MappingProxyType({"user_query": "test query"})
+_SEARCH_QUERY_STATE = MappingProxyType({"search_queries": [_FIXED_QUERY]})
+
+
 class TestPipeline:
     """파이프라인 테스트 - 모든 의존성은 Mock 인터페이스."""
 
     @pytest.fixture
-    def mock_services(self):
-        """Mock 서비스들 생성."""
-        return {
-            "llm": AsyncMock(spec=ILLMService),
-            "search": AsyncMock(spec=IWebSearchService),
-            "crawling": AsyncMock(spec=ICrawlingService),
-            "vector_store": AsyncMock(spec=IVectorStore),
-            "chunking": AsyncMock(spec=IChunkingService),
-            "retrieval": AsyncMock(spec=IRetrievalService),
-            "reranking": AsyncMock(spec=IRerankingService),
-        }
+    def mock_services(self, mocked_interfaces):
+        """테스트마다 호출 기록과 반환값/side_effect를 초기화한 Mock 서비스."""
+        for mock in mocked_interfaces.values():
+            mock.reset_mock(return_value=True, side_effect=True)
+        return mocked_interfaces
 
     @pytest.fixture
     def pipeline(self, mock_services):
-        """Mock 서비스로 파이프라인 생성."""
+        """Mock 서비스로 파이프라인 생성 (캐시 등 인스턴스 상태가 테스트 간 섞이지 않도록 매번)."""
         return QAPipeline(
             llm_service=mock_services["llm"],
             search_service=mock_services["search"],
@@ -44,16 +39,11 @@ class TestPipeline:
             reranking_service=mock_services["reranking"],
         )
 
-    @pytest.mark.asyncio
     async def test_generate_search_queries(self, pipeline, mock_services):
         """검색 쿼리 생성 단계 테스트."""
-        state = {"user_query": "test query"}
+        state = _USER_QUERY_STATE
 
-        mock_services["llm"].generate_queries.return_value = [
-            SearchQuery(
-                original_query="test query", processed_queries=["test", "query"]
-            )
-        ]
+        mock_services["llm"].generate_queries.return_value = [_FIXED_QUERY]
 
         result = await pipeline.generate_search_queries(state)
 
@@ -61,21 +51,221 @@ class TestPipeline:
         assert len(result["search_queries"]) > 0
         mock_services["llm"].generate_queries.assert_called_once_with("test query")
 
-    @pytest.mark.asyncio
+    async def test_generate_search_queries_caches_normalized_query(self, pipeline, mock_services):
+        """공백/대소문자만 다른 질문은 LLM을 다시 호출하지 않는지 테스트."""
+        mock_services["llm"].generate_queries.return_value = [
+            SearchQuery(original_query="Test Query", processed_queries=["test"])
+        ]
+
+        first = await pipeline.generate_search_queries({"user_query": "Test Query"})
+        second = await pipeline.generate_search_queries({"user_query": "  test   query "})
+
+        mock_services["llm"].generate_queries.assert_called_once()
+        assert second["search_queries"] is first["search_queries"]
+
+    async def test_generate_search_queries_does_not_cache_fallback(self, pipeline, mock_services):
+        """LLM 실패 폴백(원본 질문 하나)은 캐시하지 않고 다음 요청에서 다시 생성하는지 테스트."""
+        fallback = [SearchQuery(original_query="test query", processed_queries=["test query"])]
+        mock_services["llm"].generate_queries.side_effect = [fallback, [_FIXED_QUERY]]
+
+        first = await pipeline.generate_search_queries(_USER_QUERY_STATE)
+        second = await pipeline.generate_search_queries(_USER_QUERY_STATE)
+
+        assert first["search_queries"] == fallback
+        assert second["search_queries"] == [_FIXED_QUERY]
+        assert mock_services["llm"].generate_queries.call_count == 2
+
+    async def test_lookup_cached_chunks_routes_on_score(self, pipeline, mock_services):
+        """저장된 청크 유사도에 따라 웹 검색 생략 여부를 결정하는지 테스트."""
+        from src.core.pipeline import CACHE_HIT_MIN_SCORE
+
+        state = {"user_query": "q", "query_embedding": [0.1]}
+        mock_services["vector_store"].search.return_value = [
+            {"chunk": None, "score": CACHE_HIT_MIN_SCORE + 0.01}
+        ]
+        state.update(await pipeline.lookup_cached_chunks(state))
+        assert pipeline._route_cache_hit(state) == "hit"
+
+        mock_services["vector_store"].search.return_value = [{"chunk": None, "score": 0.1}]
+        state.update(await pipeline.lookup_cached_chunks(state))
+        assert pipeline._route_cache_hit(state) == "miss"
+
+        assert await pipeline.lookup_cached_chunks({"user_query": "q", "query_embedding": None}) == {
+            "cache_hit": False
+        }
+
     async def test_search_web(self, pipeline, mock_services):
         """웹 검색 단계 테스트."""
-        state = {
-            "search_queries": [
-                SearchQuery(original_query="test", processed_queries=["test"])
-            ]
-        }
+        # search_web은 state를 직접 수정하므로 복사본 전달
+        state = dict(_SEARCH_QUERY_STATE)
 
-        mock_services["search"].search.return_value = [
-            WebDocument(url="https://example.com", title="Test", search_query="test")
-        ]
+        mock_services["search"].search.return_value = [_FIXED_DOCUMENT]
 
         result = await pipeline.search_web(state)
 
         assert "web_documents" in result
         assert len(result["web_documents"]) > 0
         mock_services["search"].search.assert_called()
+
+    async def test_embed_query(self, pipeline, mock_services):
+        """쿼리 임베딩 단계가 변경한 키만 반환하는지 테스트."""
+        state = {"user_query": "test query"}
+
+        mock_services["llm"].get_embeddings.return_value = [[0.1, 0.2]]
+
+        result = await pipeline.embed_query(state)
+
+        assert result == {"query_embedding": [0.1, 0.2]}
+        mock_services["llm"].get_embeddings.assert_called_once_with(["test query"])
+
+    async def test_repeated_query_is_embedded_once(self, pipeline, mock_services):
+        """같은 질문은 임베딩을 한 번만 생성하고 검색 단계에도 그 임베딩을 넘기는지 테스트."""
+        mock_services["llm"].get_embeddings.return_value = [[0.1, 0.2]]
+        mock_services["retrieval"].retrieve.return_value = []
+        mock_services["reranking"].rerank.return_value = {"chunks": [], "scores": []}
+
+        for _ in range(2):
+            state = {"user_query": "test query"}
+            state.update(await pipeline.embed_query(state))
+            await pipeline.retrieve_chunks(state)
+
+        mock_services["llm"].get_embeddings.assert_called_once_with(["test query"])
+        assert all(
+            call.kwargs["query_embedding"] == [0.1, 0.2]
+            for call in mock_services["retrieval"].retrieve.call_args_list
+        )
+
+    async def test_ingest_documents(self, pipeline, mock_services):
+        """크롤링/청킹/저장 스트리밍 단계가 성공한 문서만 저장하는지 테스트."""
+        from src.core.models import WebDocumentContent, SemanticChunk
+
+        state = {
+            "user_query": "test",
+            "web_documents": [
+                WebDocument(url=f"https://example.com/{i}", title="Test", search_query="test")
+                for i in range(3)
+            ],
+        }
+
+        async def crawl(url):
+            if url.endswith("/1"):
+                return None
+            return WebDocumentContent(url=url, content="content")
+
+        mock_services["crawling"].crawl.side_effect = crawl
+        mock_services["chunking"].chunk_document.side_effect = lambda content, query: [
+            SemanticChunk(chunk_id=content.url, content="chunk", source_url=content.url, embedding=[0.1])
+        ]
+
+        result = await pipeline.ingest_documents(state)
+
+        assert len(result["document_contents"]) == 2
+        assert sorted(chunk.chunk_id for chunk in result["chunks"]) == [
+            "https://example.com/0",
+            "https://example.com/2",
+        ]
+        stored = [c for call in mock_services["vector_store"].add_chunks.call_args_list for c in call.args[0]]
+        assert len(stored) == 2
+
+    async def test_embed_and_store_reuses_embeddings_for_same_content(self, pipeline, mock_services):
+        """같은 내용의 청크는 한 번만 임베딩하는지 테스트."""
+        from src.core.models import SemanticChunk
+
+        mock_services["llm"].get_embeddings.side_effect = lambda texts: [[0.1]] * len(texts)
+        chunks = [
+            SemanticChunk(chunk_id=str(i), content="same" if i < 2 else "other", source_url="u")
+            for i in range(3)
+        ]
+
+        await pipeline._embed_and_store(chunks)
+        await pipeline._embed_and_store([SemanticChunk(chunk_id="3", content="same", source_url="u")])
+
+        mock_services["llm"].get_embeddings.assert_called_once_with(["same", "other"])
+        assert all(chunk.embedding == [0.1] for chunk in chunks)
+
+    async def test_retrieve_chunks_uses_fresh_chunks_when_confident(self, pipeline, mock_services):
+        """이번 실행 청크가 충분히 유사하면 전체 검색을 생략하는지 테스트."""
+        from src.core.models import SemanticChunk
+
+        chunks = [
+            SemanticChunk(chunk_id="near", content="a", source_url="u", embedding=[1.0, 0.0]),
+            SemanticChunk(chunk_id="far", content="b", source_url="u", embedding=[0.0, 1.0]),
+        ]
+        mock_services["reranking"].rerank.side_effect = lambda query, chunks, k: {
+            "chunks": chunks[:k], "scores": [1.0] * len(chunks[:k])
+        }
+
+        state = {"user_query": "q", "query_embedding": [2.0, 0.1], "chunks": chunks}
+        result = await pipeline.retrieve_chunks(state)
+
+        mock_services["retrieval"].retrieve.assert_not_called()
+        assert [chunk.chunk_id for chunk in result["scratch_pad"].chunks] == ["near", "far"]
+
+        # 유사도가 낮으면 전체 저장소 검색으로 대체
+        mock_services["retrieval"].retrieve.return_value = []
+        state = {"user_query": "q", "query_embedding": [1.0, 1.0], "chunks": chunks}
+        await pipeline.retrieve_chunks(state)
+        mock_services["retrieval"].retrieve.assert_called_once()
+
+    async def test_retrieve_chunks_limits_rerank_candidates(self, pipeline, mock_services):
+        """융합 순위 상위 RERANK_CANDIDATES개만 리랭커에 넘기는지 테스트."""
+        from src.core.models import SemanticChunk
+        from src.core.pipeline import RERANK_CANDIDATES
+
+        retrieved = [
+            SemanticChunk(chunk_id=str(i), content="c", source_url="u") for i in range(20)
+        ]
+        mock_services["retrieval"].retrieve.return_value = retrieved
+        mock_services["reranking"].rerank.return_value = {"chunks": [], "scores": []}
+
+        await pipeline.retrieve_chunks({"user_query": "q"})
+
+        mock_services["reranking"].rerank.assert_called_once_with(
+            "q", retrieved[:RERANK_CANDIDATES], k=5
+        )
+
+    async def test_retrieve_chunks_waits_for_prerequisite(self, pipeline, mock_services):
+        """등록된 선행 작업(세션 로드)이 끝난 뒤에 검색하는지 테스트."""
+        import asyncio
+
+        order = []
+
+        async def load_session():
+            await asyncio.sleep(0)
+            order.append("load")
+
+        async def retrieve(query, k, query_embedding=None):
+            order.append("retrieve")
+            return []
+
+        mock_services["retrieval"].retrieve.side_effect = retrieve
+        mock_services["reranking"].rerank.return_value = {"chunks": [], "scores": []}
+        pipeline.set_retrieval_prerequisite(asyncio.create_task(load_session()))
+
+        await pipeline.retrieve_chunks({"user_query": "q"})
+
+        assert order == ["load", "retrieve"]
+
+    async def test_embed_and_store_skips_chunks_when_embedding_fails(self, pipeline, mock_services):
+        """임베딩 실패 시 더미 벡터 없이 해당 청크를 제외하는지 테스트."""
+        from src.core.models import SemanticChunk
+
+        mock_services["llm"].get_embeddings.side_effect = RuntimeError("down")
+        chunks = [
+            SemanticChunk(chunk_id="a", content="new", source_url="u"),
+            SemanticChunk(chunk_id="b", content="old", source_url="u", embedding=[0.1]),
+        ]
+
+        stored = await pipeline._embed_and_store(chunks)
+
+        assert [chunk.chunk_id for chunk in stored] == ["b"]
+        mock_services["vector_store"].add_chunks.assert_called_once_with(stored)
+
+    def test_normalize_url_strips_tracking_params(self):
+        """추적 파라미터만 다른 URL이 같은 URL로 정규화되는지 테스트."""
+        from src.core.pipeline import _normalize_url
+
+        assert _normalize_url("HTTPS://Example.COM/a?utm_source=x&q=1&fbclid=y#top") == (
+            "https://example.com/a?q=1"
+        )
+        assert _normalize_url("https://example.com/a?q=%20") == "https://example.com/a?q=%20"